@@ -1,5 +1,8 @@
 import streamlit as st
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import BatchHttpRequest
+import httplib2
 import pandas as pd
 import numpy as np
 import isodate
@@ -11,6 +14,23 @@ from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import inch
 import tempfile
+from io import BytesIO
+import os
+import json
+import queue
+import pickle
+import hashlib
+import random
+import re
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: only sessions within one server process are serialized
+    fcntl = None
 
 
 warnings.filterwarnings("ignore", category=FutureWarning)
@@ -118,28 +138,297 @@ if not st.session_state.start_dashboard:
                 st.rerun()
 
 
+# ---------------- API TRANSPORT ----------------
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BATCH_LIMIT = 50  # sub-requests per multipart batch call
+
+
+class MeteredHttp(httplib2.Http):
+    # httplib2 keeps one keep-alive connection per host in self.connections,
+    # so a request that finds its host already there is a reused connection
+    def __init__(self, metrics, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+
+    def request(self, uri, *args, **kwargs):
+        known = dict(self.connections)
+        start = time.perf_counter()
+        try:
+            return super().request(uri, *args, **kwargs)
+        finally:
+            reused = bool(known) and all(self.connections.get(k) is c for k, c in known.items()) \
+                and set(self.connections) <= set(known)
+            self.metrics.record(reused, time.perf_counter() - start)
+
+
+class TransportMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.reused = 0
+        self.retries = 0
+        self.failures = 0
+        self.batches = 0
+        self.clients = 0
+        self.seconds = 0.0
+        self.payloads = {}
+
+    def record(self, reused, seconds):
+        with self.lock:
+            self.requests += 1
+            self.reused += int(reused)
+            self.seconds += seconds
+
+    def record_payload(self, endpoint, size, seconds):
+        with self.lock:
+            calls, total, parse = self.payloads.get(endpoint, (0, 0, 0.0))
+            self.payloads[endpoint] = (calls + 1, total + size, parse + seconds)
+
+    def payload_report(self):
+        with self.lock:
+            return pd.DataFrame([
+                {
+                    "Endpoint": endpoint,
+                    "Calls": calls,
+                    "KB Decoded": round(total / 1024, 1),
+                    "Avg KB Decoded / Call": round(total / 1024 / calls, 2),
+                    "Parse Time (ms)": round(parse * 1000, 2)
+                }
+                for endpoint, (calls, total, parse) in self.payloads.items()
+            ])
+
+    def count(self, field):
+        with self.lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "Requests": self.requests,
+                "Connection Reuse (%)": round(self.reused / self.requests * 100, 1) if self.requests else 0.0,
+                "Retries": self.retries,
+                "Failed Calls": self.failures,
+                "Batch Round Trips": self.batches,
+                "Pooled Clients Created": self.clients,
+                "Avg Latency (ms)": round(self.seconds / self.requests * 1000, 1) if self.requests else 0.0
+            }
+
+
+class ApiTransport:
+    # httplib2.Http is not thread safe, so a call checks a keep-alive client out of
+    # a process-wide pool and returns it afterwards. Streamlit runs every rerun on a
+    # new thread, so the pool (not the thread) is what keeps connections alive.
+    def __init__(self, timeout=15, max_retries=4, backoff_base=0.5, backoff_cap=16, max_idle=8):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.metrics = TransportMetrics()
+        self.pool = queue.LifoQueue(maxsize=max_idle)
+        # Only handed to build(); every request passes a pooled client explicitly
+        self.service_http = httplib2.Http(timeout=timeout)
+
+    def checkout(self):
+        try:
+            return self.pool.get_nowait()
+        except queue.Empty:
+            self.metrics.count("clients")
+            return MeteredHttp(self.metrics, timeout=self.timeout)
+
+    def checkin(self, http):
+        try:
+            self.pool.put_nowait(http)
+        except queue.Full:
+            http.close()
+
+    def execute(self, request):
+        self.measure_payload(request)
+        return self.with_retries(lambda http: request.execute(http=http))
+
+    def with_retries(self, call):
+        # Only used for idempotent list calls, so every attempt is safe to repeat
+        for attempt in range(self.max_retries + 1):
+            http = self.checkout()
+            try:
+                result = call(http)
+            except HttpError as e:
+                self.checkin(http)
+                if e.resp.status not in RETRY_STATUSES or attempt == self.max_retries:
+                    self.metrics.count("failures")
+                    raise
+            except (socket.timeout, ConnectionError, httplib2.HttpLib2Error):
+                # Broken connection: the client is not returned, the next attempt gets a fresh one
+                http.close()
+                if attempt == self.max_retries:
+                    self.metrics.count("failures")
+                    raise
+            else:
+                self.checkin(http)
+                return result
+
+            self.backoff(attempt)
+
+    def backoff(self, attempt):
+        self.metrics.count("retries")
+        delay = min(self.backoff_cap, self.backoff_base * 2 ** attempt)
+        time.sleep(random.uniform(0, delay))
+
+    def execute_batch(self, youtube, requests):
+        # requests: {request_id: HttpRequest}. Returns {request_id: response or exception}
+        results = {}
+        pending = dict(requests)
+        for request in pending.values():
+            self.measure_payload(request)
+
+        for attempt in range(self.max_retries + 1):
+            retry = {}
+
+            def callback(request_id, response, exception):
+                if exception is None:
+                    results[request_id] = response
+                elif isinstance(exception, HttpError) and exception.resp.status in RETRY_STATUSES \
+                        and attempt < self.max_retries:
+                    retry[request_id] = pending[request_id]
+                else:
+                    self.metrics.count("failures")
+                    results[request_id] = exception
+
+            ids = list(pending)
+            for i in range(0, len(ids), BATCH_LIMIT):
+                batch = youtube.new_batch_http_request(callback=callback)
+                for request_id in ids[i:i + BATCH_LIMIT]:
+                    batch.add(pending[request_id], request_id=request_id)
+                self.with_retries(lambda http: batch.execute(http=http))
+                self.metrics.count("batches")
+
+            if not retry:
+                break
+            self.backoff(attempt)
+            pending = retry
+
+        return results
+
+    def measure_payload(self, request):
+        # postproc is where the client decodes the JSON body. httplib2 has already
+        # gunzipped it (and rewritten content-length), so sizes are decoded bytes
+        # of the JSON payload, not bytes on the wire
+        endpoint = request.uri.split("?")[0].rsplit("/", 1)[-1]
+        postproc = request.postproc
+
+        def timed_postproc(resp, content):
+            start = time.perf_counter()
+            try:
+                return postproc(resp, content)
+            finally:
+                self.metrics.record_payload(endpoint, len(content or b""), time.perf_counter() - start)
+
+        request.postproc = timed_postproc
+
+
+@st.cache_resource
+def get_transport():
+    return ApiTransport(timeout=st.secrets.get("API_TIMEOUT", 15))
+
+
+def build_youtube(api_key):
+    # API_ENDPOINT points the client at another server (e.g. the load-test fake API)
+    api_endpoint = st.secrets.get("API_ENDPOINT")
+    if not api_endpoint:
+        return build("youtube", "v3", developerKey=api_key, http=get_transport().service_http)
+
+    youtube = build(
+        "youtube", "v3", developerKey=api_key, http=get_transport().service_http,
+        client_options={"api_endpoint": api_endpoint}
+    )
+    # Batch calls use the discovery rootUrl, not api_endpoint, so redirect them too
+    batch_uri = api_endpoint.rstrip("/") + "/batch"
+    youtube.new_batch_http_request = lambda callback=None: BatchHttpRequest(callback=callback, batch_uri=batch_uri)
+    return youtube
+
+
+def execute_request(request):
+    return get_transport().execute(request)
+
+
+def execute_batch(youtube, requests):
+    return get_transport().execute_batch(youtube, requests)
+
+
+# ---------------- FIELD PROJECTION ----------------
+# Only the response fields the dashboard reads; everything else stays on the server
+VIDEO_FIELDS = {
+    "VideoID": "id",
+    "Title": "snippet/title",
+    "CategoryID": "snippet/categoryId",
+    "Published": "snippet/publishedAt",
+    "Duration (mins)": "contentDetails/duration",
+    "Views": "statistics/viewCount",
+    "Likes": "statistics/likeCount",
+    "Comments": "statistics/commentCount"
+}
+
+CHANNEL_FIELDS = {
+    "ChannelID": "id",
+    "Uploads Playlist": "contentDetails/relatedPlaylists/uploads",
+    "Channel": "snippet/title",
+    "Logo": "snippet/thumbnails/high/url",
+    "Statistics": "statistics"
+}
+
+
+def fields_mask(paths):
+    # ["snippet/title", "snippet/categoryId", "id"] -> "id,snippet(categoryId,title)"
+    tree = {}
+    for path in paths:
+        node = tree
+        for part in path.split("/"):
+            node = node.setdefault(part, {})
+
+    def render(node):
+        return ",".join(
+            name + (f"({render(child)})" if child else "")
+            for name, child in sorted(node.items())
+        )
+
+    return render(tree)
+
+
+VIDEO_FIELDS_MASK = f"items({fields_mask(VIDEO_FIELDS.values())})"
+CHANNEL_FIELDS_MASK = f"items({fields_mask(CHANNEL_FIELDS.values())})"
+PLAYLIST_FIELDS_MASK = "nextPageToken,items/contentDetails/videoId"
+SEARCH_FIELDS_MASK = "items/snippet/channelId"
+
+
 # ---------------- FUNCTIONS ----------------
-def extract_channel_id(url, youtube):
+@st.cache_data(ttl=24 * 60 * 60, show_spinner=False)
+def resolve_handle(handle, api_key):
+    # A search costs 100 quota units and would otherwise run on every rerun
+    search_response = execute_request(build_youtube(api_key).search().list(
+        part="snippet",
+        q=handle,
+        type="channel",
+        maxResults=1,
+        fields=SEARCH_FIELDS_MASK
+    ))
+
+    if search_response.get("items"):
+        return search_response["items"][0]["snippet"]["channelId"]
+    return None
+
+
+def extract_channel_id(url, api_key):
     url = url.strip()
 
     # Case 1: Full channel ID URL
     if "youtube.com/channel/" in url:
         return url.split("channel/")[1].split("/")[0]
 
-    # Case 2: Handle URL (@tseries)
+    # Case 2: Handle URL (@tseries); handles are case-insensitive
     if "@" in url:
         handle = url.split("@")[1].split("/")[0]
 
         try:
-            search_response = youtube.search().list(
-                part="snippet",
-                q=handle,
-                type="channel",
-                maxResults=1
-            ).execute()
-
-            if search_response.get("items"):
-                return search_response["items"][0]["snippet"]["channelId"]
+            return resolve_handle(handle.lower(), api_key)
         except Exception as e:
             st.error(f"Handle search failed: {e}")
             return None
@@ -153,37 +442,56 @@ def extract_channel_id(url, youtube):
 
 
 
-def get_uploads_playlist_id(channel_id, youtube):
-    res = youtube.channels().list(
-        part="contentDetails,snippet,statistics",
-        id=channel_id
-    ).execute()
+def get_channels_metadata(channel_ids, youtube):
+    # Up to 50 ids per channels().list, and all those calls share one batch round trip
+    requests = {
+        str(i): youtube.channels().list(
+            part="contentDetails,snippet,statistics",
+            id=",".join(channel_ids[i:i+50]),
+            fields=CHANNEL_FIELDS_MASK
+        )
+        for i in range(0, len(channel_ids), 50)
+    }
 
-    if not res.get("items"):
-        return None, None, None, None
+    channels = {}
+    for request_id, res in execute_batch(youtube, requests).items():
+        if isinstance(res, Exception):
+            st.warning(f"⚠ Channel lookup failed for part of the request: {res}")
+            continue
+
+        for info in res.get("items", []):
+            channels[info["id"]] = (
+                info["contentDetails"]["relatedPlaylists"]["uploads"],
+                info["snippet"]["title"],
+                info["statistics"],
+                info["snippet"]["thumbnails"]["high"]["url"]
+            )
 
-    info = res["items"][0]
-    playlist_id = info["contentDetails"]["relatedPlaylists"]["uploads"]
-    channel_name = info["snippet"]["title"]
-    stats = info["statistics"]
-    channel_logo = info["snippet"]["thumbnails"]["high"]["url"]
+    return channels
 
-    return playlist_id, channel_name, stats, channel_logo
+
+def get_uploads_playlist_id(channel_id, youtube):
+    return get_channels_metadata([channel_id], youtube).get(channel_id, (None, None, None, None))
 
 
-def get_videos_from_playlist(playlist_id, youtube, max_results=100):
+def get_videos_from_playlist(playlist_id, youtube, max_results=100, known=None):
     videos = []
     next_page = None
 
-    while len(videos) < max_results:
-        res = youtube.playlistItems().list(
+    # max_results=None pages through every upload. known is an earlier listing of the
+    # same playlist (newest first): paging stops at its newest video and appends it.
+    while max_results is None or len(videos) < max_results:
+        res = execute_request(youtube.playlistItems().list(
             part="contentDetails",
             playlistId=playlist_id,
             maxResults=50,
-            pageToken=next_page
-        ).execute()
+            pageToken=next_page,
+            fields=PLAYLIST_FIELDS_MASK
+        ))
 
         for item in res.get("items", []):
+            if known and item["contentDetails"]["videoId"] == known[0]:
+                return videos + list(known)
             videos.append(item["contentDetails"]["videoId"])
 
         next_page = res.get("nextPageToken")
@@ -195,12 +503,22 @@ def get_videos_from_playlist(playlist_id, youtube, max_results=100):
 def get_video_stats(video_ids, youtube):
     data = []
 
-    for i in range(0, len(video_ids), 50):
-        chunk = video_ids[i:i+50]
-        res = youtube.videos().list(
+    # Every 50-id chunk is its own videos().list, multiplexed into one batch call
+    requests = {
+        str(i): youtube.videos().list(
             part="snippet,statistics,contentDetails",
-            id=",".join(chunk)
-        ).execute()
+            id=",".join(video_ids[i:i+50]),
+            fields=VIDEO_FIELDS_MASK
+        )
+        for i in range(0, len(video_ids), 50)
+    }
+    responses = execute_batch(youtube, requests)
+
+    for request_id in requests:
+        res = responses.get(request_id)
+        if isinstance(res, Exception) or res is None:
+            st.warning(f"⚠ Skipped {len(video_ids[int(request_id):int(request_id)+50])} videos: {res}")
+            continue
 
         for item in res["items"]:
             snippet = item.get("snippet", {})
@@ -224,33 +542,1005 @@ def get_video_stats(video_ids, youtube):
                 "Title": snippet.get("title", ""),
                 "CategoryID": category_id,
                 "Type": "Short" if is_short else "Long",  
-                "Published": snippet.get("publishedAt", "").split("T")[0],
+                "Published": snippet.get("publishedAt", ""),
                 "Views": view_count,
                 "Likes": like_count,
                 "Comments": comment_count,
                 "Engagement (%)": engagement,
-                "Duration (mins)": duration_minutes,
-                "URL": f"https://youtu.be/{item['id']}"
+                "Duration (mins)": duration_minutes
             })
 
     return data
 
 
+# ---------------- COMPACT DATAFRAME ----------------
+THUMBNAIL_HOST = st.secrets.get("THUMBNAIL_HOST", "https://i.ytimg.com")
+
+
+# URLs are derived from VideoID on demand instead of being stored per row
+def video_url(video_id):
+    return f"https://youtu.be/{video_id}"
+
+
+def thumbnail_url(video_id):
+    return f"{THUMBNAIL_HOST}/vi/{video_id}/hqdefault.jpg"
+
+
+def with_urls(df):
+    # Only used right before display / export, never kept on the working df
+    return df.assign(URL=df["VideoID"].map(video_url))
+
+
+def compact_video_df(df):
+    # Unique strings -> one Arrow buffer each instead of a Python object per row
+    for col in ["VideoID", "Title"]:
+        if col in df.columns:
+            df[col] = df[col].astype(pd.StringDtype("pyarrow"))
+
+    # Repeated strings -> categoricals
+    for col in ["CategoryID", "Category", "Type"]:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+
+    # Counts -> smallest signed int that fits (signed so differences never wrap)
+    for col in ["Views", "Likes", "Comments"]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+
+    for col in ["Engagement (%)", "Duration (mins)"]:
+        if col in df.columns:
+            df[col] = df[col].astype("float32")
+
+    # Full-resolution UTC instants; converted to the viewer's timezone once, after compaction
+    if "Published" in df.columns:
+        df["Published"] = pd.to_datetime(df["Published"], errors="coerce", utc=True)
+
+    return df
+
+
+def wall_clock(published):
+    # Drop the tz but keep local wall time, for period bucketing (months, weeks, hours)
+    return published.dt.tz_localize(None) if published.dt.tz is not None else published
+
+
+def viewer_timezone():
+    # st.context.timezone only exists on newer Streamlit and only in a browser session
+    context = getattr(st, "context", None)
+    return getattr(context, "timezone", None) or st.secrets.get("TIMEZONE", "UTC")
+
+
+def memory_footprint(df):
+    usage = df.memory_usage(deep=True, index=True)
+    report = pd.DataFrame({
+        "Column": usage.index.astype(str),
+        "Dtype": [str(df.index.dtype) if c == "Index" else str(df[c].dtype) for c in usage.index],
+        "Bytes": usage.values
+    })
+    return report.sort_values(by="Bytes", ascending=False).reset_index(drop=True)
+
+
+CATEGORY_MAP = {
+    "1": "Film & Animation", "2": "Autos & Vehicles", "10": "Music",
+    "15": "Pets & Animals", "17": "Sports", "19": "Travel & Events",
+    "20": "Gaming", "22": "People & Blogs", "23": "Comedy",
+    "24": "Entertainment", "25": "News & Politics", "26": "How-to & Style",
+    "27": "Education", "28": "Science & Tech", "29": "Nonprofits"
+}
+
+
+def channel_frame(records):
+    # Everything that depends on the records alone; built once per snapshot version
+    df = pd.DataFrame(records)
+    df["Category"] = df["CategoryID"].astype(str).map(CATEGORY_MAP).fillna("Unknown")
+
+    # Baseline: the frame exactly as built from the records, before compaction
+    raw_bytes = int(df.memory_usage(deep=True).sum())
+    df = compact_video_df(df)
+
+    # Viral Score is relative to the whole channel, so it is scored before filtering
+    viral_raw = (
+       df["Views"] * 0.60 +
+       df["Likes"] * 0.30 +
+       df["Comments"] * 0.10
+    )
+    df["Viral Score"] = np.round((viral_raw / viral_raw.max()) * 100, 2).astype("float32")
+    return df, raw_bytes
+
+
 
     
 
 
+# ---------------- VIDEO INDEX ----------------
+RANK_METRICS = ["Views", "Likes", "Comments", "Engagement (%)", "Duration (mins)", "Viral Score"]
+
+
+@st.cache_data(show_spinner=False)
+def build_video_index(df):
+    # One vectorized pass: every rank for every video, keyed by VideoID
+    df = df.reset_index(drop=True)
+    metrics = [m for m in RANK_METRICS if m in df.columns]
+    values = df[metrics].astype("float64")
+
+    std = values.std(ddof=0).replace(0, np.nan)
+    ranks = pd.concat({
+        "Percentile": values.rank(pct=True) * 100,
+        "Z-Score": (values - values.mean()) / std,
+        "Category Percentile": values.groupby(df["Category"], observed=True).rank(pct=True) * 100,
+        "Type Percentile": values.groupby(df["Type"], observed=True).rank(pct=True) * 100,
+    }, axis=1).astype("float32")
+    ranks.index = pd.Index(df["VideoID"], name="VideoID")
+
+    # Row position of each VideoID in the working df (first one wins on repeats)
+    unique = ~ranks.index.duplicated()
+    ranks = ranks[unique]
+    positions = pd.Series(np.flatnonzero(unique), index=ranks.index)
+
+    return ranks, positions, values.mean()
+
+
+def lookup_video(ranks, video_id):
+    # Hash lookup on the VideoID index, returns metric x statistic table
+    return ranks.loc[video_id].unstack(level=0)
+
+
+# ---------------- OUTLIER DETECTION ----------------
+MAD_SCALE = 0.6745  # makes MAD-based z comparable to a normal z-score
+
+
+def rolling_robust_z(values, window=15, min_periods=5):
+    # Trailing median/MAD baseline of the previous `window` points (current point excluded)
+    values = np.asarray(values, dtype="float64")
+    padded = np.concatenate([np.full(window, np.nan), values[:-1]]) if len(values) else values
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window) if len(values) else np.empty((0, window))
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)  # all-NaN history at the start
+        median = np.nanmedian(windows, axis=1)
+        mad = np.nanmedian(np.abs(windows - median[:, None]), axis=1)
+
+    enough = np.count_nonzero(~np.isnan(windows), axis=1) >= min_periods
+    mad = np.where(mad > 0, mad, np.nan)
+    return np.where(enough, MAD_SCALE * (values - median) / mad, np.nan)
+
+
+def group_robust_z(values, groups):
+    # Median/MAD baseline within each group (category, type ...)
+    grouped = values.groupby(groups, observed=True)
+    median = grouped.transform("median")
+    mad = (values - median).abs().groupby(groups, observed=True).transform("median")
+    return MAD_SCALE * (values - median) / mad.where(mad > 0)
+
+
+def detect_video_outliers(df, window=15, threshold=3.5):
+    # Views are heavy tailed, so baselines are built on log views
+    log_views = np.log1p(df["Views"].astype("float64"))
+    order = np.argsort(df["Published"].values, kind="stable")
+
+    rolling = np.empty(len(df))
+    rolling[order] = rolling_robust_z(log_views.values[order], window)
+
+    scores = pd.DataFrame({
+        "Rolling Z": rolling,
+        "Category Z": group_robust_z(log_views, df["Category"]).values,
+        "Type Z": group_robust_z(log_views, df["Type"]).values,
+    }, index=df.index).astype("float32")
+
+    # Strongest signal decides the direction
+    strongest = scores.abs().fillna(0).values.argmax(axis=1)
+    peak = scores.values[np.arange(len(scores)), strongest]
+    scores["Flag"] = np.select(
+        [peak >= threshold, peak <= -threshold],
+        ["🚀 Over-performer", "🐢 Under-performer"],
+        default=""
+    )
+    return scores
+
+
+def detect_week_anomalies(weekly_views, window=8, threshold=3.5):
+    z = rolling_robust_z(np.log1p(weekly_views.values.astype("float64")), window, min_periods=4)
+    return pd.DataFrame({"Views": weekly_views.values, "Robust Z": np.round(z, 2)}, index=weekly_views.index)[
+        np.abs(np.nan_to_num(z)) >= threshold
+    ]
+
+
+# ---------------- PEER CORPUS ----------------
+CORPUS_DIR = st.secrets.get("CORPUS_DIR", "corpus")
+CORPUS_PATH = os.path.join(CORPUS_DIR, "channels.csv")
+SKETCH_PATH = os.path.join(CORPUS_DIR, "sketches.json")
+CORPUS_METRICS = ["Median Views", "Avg Engagement (%)", "Avg Viral Score", "Uploads per Week", "Shorts Share (%)"]
+SKETCH_QUANTILES = np.linspace(0, 1, 101)
+
+
+def _weighted_median(values, weights):
+    order = np.argsort(values, kind="stable")
+    cumulative = np.cumsum(weights[order])
+    return float(values[order][np.searchsorted(cumulative, cumulative[-1] / 2)]) if len(values) else np.nan
+
+
+def channel_profile(df, channel_id, channel_name, n_uploads=None):
+    # A whole-channel sample carries Weight (uploads each video stands for) and the
+    # real upload count, so every metric is a channel-wide estimate, not a sample value
+    w = df["Weight"].to_numpy(dtype="float64") if "Weight" in df.columns else np.ones(len(df))
+    n_uploads = n_uploads or len(df)
+
+    published = df["Published"].dropna()
+    span_weeks = max((published.max() - published.min()).days / 7, 1) if len(published) else 1
+    category_views = (df["Views"] * w).groupby(df["Category"], observed=True).sum()
+
+    def weighted_mean(column):
+        return float(np.average(df[column].to_numpy(dtype="float64"), weights=w)) if len(df) else np.nan
+
+    return {
+        "ChannelID": channel_id,
+        "Channel": channel_name,
+        "Category": category_views.idxmax() if len(category_views) else "Unknown",
+        "Videos": n_uploads,
+        "Median Views": _weighted_median(df["Views"].to_numpy(dtype="float64"), w),
+        "Avg Engagement (%)": weighted_mean("Engagement (%)"),
+        "Avg Viral Score": weighted_mean("Viral Score") if "Viral Score" in df.columns else np.nan,
+        "Uploads per Week": round(n_uploads * (len(published) / len(df) if len(df) else 0) / span_weeks, 3),
+        "Shorts Share (%)": float(np.average((df["Type"] == "Short").to_numpy(), weights=w) * 100) if len(df) else np.nan,
+        "Updated": pd.Timestamp.now(tz="UTC").isoformat()
+    }
+
+
+def build_quantile_sketches(corpus):
+    # Per category (plus "All"), a fixed grid of quantiles per metric
+    sketches = {}
+    groups = [("All", corpus)] + list(corpus.groupby("Category"))
+    for category, group in groups:
+        sketches[category] = {"Channels": len(group)}
+        for metric in CORPUS_METRICS:
+            values = group[metric].dropna().values
+            if len(values):
+                sketches[category][metric] = np.quantile(values, SKETCH_QUANTILES).tolist()
+    return sketches
+
+
+def _atomic_write(path, data):
+    # Sessions may update the corpus concurrently, so never leave a half-written file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    if isinstance(data, bytes):
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+    else:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+    os.replace(tmp_path, path)
+
+
+@st.cache_resource
+def _path_lock(path):
+    return threading.Lock()
+
+
+@contextmanager
+def file_lock(path, blocking=True):
+    # Read-modify-write of a shared file: a thread lock for sessions in this
+    # process, flock on a sidecar file for other server processes.
+    # Yields whether the lock is held; only False when blocking=False and it is taken.
+    lock = _path_lock(path)
+    if not lock.acquire(blocking):
+        yield False
+        return
+    try:
+        if fcntl is None:
+            yield True
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".lock", "a") as handle:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+    finally:
+        lock.release()
+
+
+@st.cache_resource
+def _upserted_versions():
+    # (channel, data version) pairs this server already wrote to the corpus
+    return set()
+
+
+def update_corpus(profile, version):
+    # The profile only moves when the snapshot data does, so reruns skip the disk entirely
+    key = (profile["ChannelID"], version)
+    if key in _upserted_versions():
+        return
+
+    os.makedirs(CORPUS_DIR, exist_ok=True)
+    with file_lock(CORPUS_PATH):
+        # Hex digests like "1234e567" would otherwise be inferred as numbers and never match
+        corpus = pd.read_csv(CORPUS_PATH, dtype={"ChannelID": str, "Version": str}) if os.path.exists(CORPUS_PATH) else pd.DataFrame(columns=list(profile))
+        current = corpus[corpus["ChannelID"] == profile["ChannelID"]]
+        if "Version" not in current.columns or not (current["Version"] == version).any():
+            corpus = corpus[corpus["ChannelID"] != profile["ChannelID"]]
+            corpus = pd.concat([corpus, pd.DataFrame([dict(profile, Version=version)])], ignore_index=True)
+
+            _atomic_write(CORPUS_PATH, corpus.to_csv(index=False))
+            _atomic_write(SKETCH_PATH, json.dumps(build_quantile_sketches(corpus)))
+    _upserted_versions().add(key)
+
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def load_sketches(mtime):
+    # mtime is only part of the cache key, so a rebuilt sketch file is re-read once;
+    # older versions are evicted instead of piling up
+    with open(SKETCH_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# The channel itself is one of the sketch's n channels; both helpers below take
+# its own point back out so it is only compared against its peers
+def peer_percentile(sketch, metric, value):
+    grid, n = sketch.get(metric), sketch["Channels"]
+    if grid is None or pd.isna(value) or n < 2:
+        return np.nan
+    # Ties in the grid (many equal channels) -> average position
+    low = np.searchsorted(grid, value, side="left")
+    high = np.searchsorted(grid, value, side="right")
+    share = np.interp((low + high) / 2, [0, len(grid)], [0, 1])
+    return float(np.clip((share * n - 0.5) / (n - 1), 0, 1) * 100)
+
+
+def peer_median(sketch, metric, value):
+    grid, n = sketch.get(metric), sketch["Channels"]
+    if grid is None or pd.isna(value) or n < 2:
+        return np.nan
+    # The peers' median sits one position up the full grid when the channel is below it
+    position = (n - 2) / 2 + (value <= grid[50])
+    return float(np.interp(position / (n - 1), SKETCH_QUANTILES, grid))
+
+
+# ---------------- REVENUE SIMULATION ----------------
+# Median RPM by niche (approx values); the simulation draws around these
+RPM_MAP = {
+    "Music": 0.60,
+    "Entertainment": 1.20,
+    "Comedy": 0.90,
+    "Education": 2.50,
+    "Technology": 3.20,
+    "Science & Tech": 3.20,
+    "How-to & Style": 1.80,
+    "Gaming": 1.40,
+    "News & Politics": 2.20,
+    "People & Blogs": 1.00,
+    "Unknown": 1.00
+}
+
+# RPM multiplier by audience geography, normalised so a 30% Tier-1 audience = 1.0
+GEO_RPM = {"Tier 1": 2.0, "Rest": 0.57}
+REVENUE_DRAWS = 10_000
+REVENUE_QUANTILES = [10, 50, 90]
+REVENUE_SCENARIO = (30, 10, 0.35)  # slider defaults: Tier-1 share (%), Shorts RPM vs Long (%), RPM sigma
+
+
+@st.cache_data(show_spinner=False)
+def simulate_revenue(frame, tier1_share, shorts_factor, rpm_sigma, n_draws=REVENUE_DRAWS, seed=7):
+    # RPM uncertainty is shared by all videos of a niche, so it is drawn per category
+    # (categories x draws) and every video's revenue is a linear scaling of its row
+    cat_index, cat_names = pd.factorize(frame["Category"].astype(str))
+    median_rpm = pd.Series(cat_names).map(RPM_MAP).fillna(RPM_MAP["Unknown"]).to_numpy()
+
+    rng = np.random.default_rng(seed)
+    rpm_draws = median_rpm[:, None] * rng.lognormal(0.0, rpm_sigma, size=(len(cat_names), n_draws))
+
+    geo = tier1_share * GEO_RPM["Tier 1"] + (1 - tier1_share) * GEO_RPM["Rest"]
+    is_short = (frame["Type"].astype(str) == "Short").to_numpy()
+    weight = frame["Views"].to_numpy(dtype="float64") / 1000 * geo * np.where(is_short, shorts_factor, 1.0)
+
+    labels = [f"P{q}" for q in REVENUE_QUANTILES]
+    cat_quantiles = np.percentile(rpm_draws, REVENUE_QUANTILES, axis=1).T
+    per_video = pd.DataFrame(weight[:, None] * cat_quantiles[cat_index], columns=labels, index=frame.index)
+
+    channel_draws = np.bincount(cat_index, weights=weight, minlength=len(cat_names)) @ rpm_draws
+    channel = dict(zip(labels, np.percentile(channel_draws, REVENUE_QUANTILES)))
+
+    return per_video, channel
+
+
+# ---------------- SEARCH ----------------
+SEARCH_COLUMNS = ["Title", "Tags"]
+TOKEN_PATTERN = r"\w+"
+
+
+@st.cache_data(show_spinner=False)
+def build_search_index(frame):
+    # Inverted index: sorted vocabulary + one sorted array of row positions per term
+    text = frame["Title"].astype(str)
+    if "Tags" in frame.columns:
+        text = text + " " + frame["Tags"].map(lambda tags: " ".join(tags) if isinstance(tags, list) else "")
+
+    tokens = text.str.lower().str.findall(TOKEN_PATTERN).explode().dropna()
+    pairs = pd.DataFrame({"Term": tokens.values, "Row": tokens.index.values}).drop_duplicates()
+    pairs = pairs.sort_values(by=["Term", "Row"], kind="stable")
+
+    vocabulary, starts = np.unique(pairs["Term"].to_numpy(dtype=str), return_index=True)
+    postings = np.split(pairs["Row"].to_numpy(dtype="int64"), starts[1:])
+    return vocabulary, postings
+
+
+def search_positions(search_index, query):
+    # Every query word must match (AND); each word is a prefix so partial typing works
+    vocabulary, postings = search_index
+    result = None
+    for word in re.findall(TOKEN_PATTERN, query.lower()):
+        lo = np.searchsorted(vocabulary, word, side="left")
+        hi = np.searchsorted(vocabulary, word + "\uffff", side="left")
+        rows = np.unique(np.concatenate(postings[lo:hi])) if hi > lo else np.empty(0, dtype="int64")
+        result = rows if result is None else np.intersect1d(result, rows, assume_unique=True)
+        if not len(result):
+            break
+    return result
+
+
+def filter_videos(df, search_index, query="", date_range=None, types=None, categories=None, min_views=0):
+    mask = np.ones(len(df), dtype=bool)
+
+    if query.strip():
+        rows = search_positions(search_index, query)
+        if rows is not None:
+            hits = np.zeros(len(df), dtype=bool)
+            hits[rows] = True
+            mask &= hits
+
+    if date_range:
+        # Local midnight can be skipped or repeated by DST (e.g. America/Santiago)
+        tz = df["Published"].dt.tz
+        start = pd.Timestamp(date_range[0]).tz_localize(tz, nonexistent="shift_forward", ambiguous=False)
+        end = (pd.Timestamp(date_range[1]) + pd.Timedelta(days=1)).tz_localize(tz, nonexistent="shift_forward", ambiguous=False)
+        mask &= ((df["Published"] >= start) & (df["Published"] < end)).to_numpy()
+    if types:
+        mask &= df["Type"].isin(types).to_numpy()
+    if categories:
+        mask &= df["Category"].isin(categories).to_numpy()
+    if min_views:
+        mask &= (df["Views"] >= min_views).to_numpy()
+
+    # No active filter -> keep the same frame instead of copying it
+    if mask.all():
+        return df
+    return df[mask].reset_index(drop=True)
+
+
+# ---------------- KEYWORD LIFT ----------------
+STOPWORDS = {
+    "a", "an", "and", "the", "of", "to", "in", "on", "for", "with", "is", "at", "by",
+    "from", "my", "your", "this", "that", "it", "vs", "ft", "feat", "official", "video"
+}
+LIFT_METRICS = ["Views", "Engagement (%)", "Viral Score"]
+
+
+def title_terms(title, tags=None, max_n=2):
+    words = [w for w in re.findall(TOKEN_PATTERN, title.lower()) if w not in STOPWORDS and len(w) > 1]
+    terms = set(words)
+    for n in range(2, max_n + 1):
+        terms.update(" ".join(words[i:i + n]) for i in range(len(words) - n + 1))
+    if isinstance(tags, list):
+        terms.update(tag.lower() for tag in tags)
+    return terms
+
+
+class KeywordIndex:
+    # Term codes per video, so a lift query only gathers the rows of its own videos.
+    # A video is re-tokenized when its title or tags change; metrics are joined
+    # fresh on every lift query.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.vocabulary = {}
+        self.terms = []
+        self.videos = {}  # VideoID -> ((title, tags), term codes)
+
+    def add(self, frame):
+        tags = frame["Tags"] if "Tags" in frame.columns else [None] * len(frame)
+        with self.lock:
+            for video_id, title, tag_list in zip(frame["VideoID"], frame["Title"], tags):
+                text = (title, tuple(tag_list) if isinstance(tag_list, list) else None)
+                entry = self.videos.get(video_id)
+                if entry is not None and entry[0] == text:
+                    continue
+
+                codes = []
+                for term in title_terms(title, tag_list):
+                    if term not in self.vocabulary:
+                        self.vocabulary[term] = len(self.terms)
+                        self.terms.append(term)
+                    codes.append(self.vocabulary[term])
+                # Replacing the entry drops the terms of an old title
+                self.videos[video_id] = (text, np.asarray(codes, dtype="int32"))
+
+    def lift(self, frame, min_support=3):
+        metrics = [m for m in LIFT_METRICS if m in frame.columns]
+
+        # A video listed twice would be counted twice; count it once
+        if not frame["VideoID"].is_unique:
+            frame = frame[~frame["VideoID"].duplicated()]
+
+        with self.lock:
+            codes = [self.videos[v][1] if v in self.videos else np.empty(0, dtype="int32") for v in frame["VideoID"]]
+            terms = self.terms
+
+        # (row, term) pairs of just these videos, with terms renumbered locally,
+        # then rare terms dropped before aggregating
+        rows = np.repeat(np.arange(len(frame)), [len(c) for c in codes])
+        term_ids, term_codes = np.unique(np.concatenate(codes + [np.empty(0, dtype="int32")]), return_inverse=True)
+        support = np.bincount(term_codes, minlength=len(term_ids))
+        keep = support[term_codes] >= min_support
+        term_codes, rows = term_codes[keep], rows[keep]
+
+        values = pd.DataFrame(frame[metrics].to_numpy(dtype="float64")[rows], columns=metrics)
+        medians = values.groupby(term_codes).median()
+
+        baseline = frame[metrics].astype("float64").median().replace(0, np.nan)
+        lift = (medians / baseline).round(2).add_suffix(" Lift")
+        lift.insert(0, "Videos", support[medians.index])
+        lift.index = pd.Index([terms[t] for t in term_ids[medians.index]], name="Term", dtype=object)
+        return lift.sort_values(by="Views Lift", ascending=False)
+
+
+@st.cache_resource
+def get_keyword_index():
+    return KeywordIndex()
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def compute_keyword_lift(version, filters, min_support, _channel_frame, _frame):
+    # Keyed by the snapshot version and the active filters instead of hashing the frames
+    index = get_keyword_index()
+    index.add(_channel_frame)
+    return index.lift(_frame, min_support=min_support)
+
+
+# ---------------- SNAPSHOTS ----------------
+# One bundle per channel and scope: fetched records, the frame derived from them, the
+# unfiltered view's tables and chart specs, rendered figures and thumbnail brightness.
+# Viewers are served from it until it goes stale.
+SNAPSHOT_DIR = st.secrets.get("SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_FORMAT = 3
+SNAPSHOT_TTL = 15 * 60  # seconds before the API is checked for new data
+SNAPSHOT_CACHE_ENTRIES = 64  # bundles held in memory; every write adds a new (path, mtime) key
+SNAPSHOT_VIEWS = 128  # stored views per bundle (widget settings and timezones multiply them), oldest dropped first
+
+
+def snapshot_key(channel_id, kind):
+    # Latest-uploads and whole-channel bundles live side by side; whole-channel
+    # budgets share one bundle since a bigger sample contains every smaller one
+    return f"{channel_id}-{kind}"
+
+
+def snapshot_path(key):
+    return os.path.join(SNAPSHOT_DIR, f"{key}.pkl")
+
+
+def data_version(records):
+    # Changes whenever a video is added/removed or any of its numbers move; sampled
+    # weights move with the upload count even when the sampled videos do not
+    digest = hashlib.sha1(str(SNAPSHOT_FORMAT).encode())
+    for r in records:
+        digest.update(f"{r['VideoID']}|{r['Title']}|{r['Views']}|{r['Likes']}|{r['Comments']}|{r.get('Weight', '')}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+@st.cache_data(max_entries=SNAPSHOT_CACHE_ENTRIES, show_spinner=False)
+def _read_snapshot(path, mtime):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def load_snapshot(key):
+    path = snapshot_path(key)
+    if not os.path.exists(path):
+        return None
+    bundle = _read_snapshot(path, os.path.getmtime(path))
+    return bundle if bundle.get("format") == SNAPSHOT_FORMAT else None
+
+
+def save_snapshot(key, bundle):
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    _atomic_write(snapshot_path(key), pickle.dumps(bundle))
+
+
+def snapshot_is_stale(bundle):
+    return time.time() - bundle["checked"] > SNAPSHOT_TTL
+
+
+def snapshot_serves(bundle, scope):
+    if bundle is None or bundle.get("scope") is None:
+        return False
+    kind, size = bundle["scope"]
+    return kind == scope[0] and (size == scope[1] or (kind == "sampled" and size > scope[1]))
+
+
+def refresh_snapshot(key, bundle, channel, records, scope=None, uploads=None):
+    version = data_version(records)
+    with file_lock(snapshot_path(key)):
+        # Start from the file, not this session's copy, so other sessions' additions survive
+        bundle = load_snapshot(key) or bundle
+        if bundle is not None and bundle["version"] == version:
+            # Same data: keep every rendered figure, just mark it as checked
+            bundle = dict(bundle, channel=channel, checked=time.time(), scope=scope, uploads=uploads)
+        else:
+            # New numbers: the frame is derived again and views/figures are rebuilt on
+            # demand, thumbnail brightness carries over
+            frame, raw_bytes = channel_frame(records) if records else (None, 0)
+            bundle = {
+                "format": SNAPSHOT_FORMAT,
+                "version": version,
+                "created": time.time(),
+                "checked": time.time(),
+                "channel": channel,
+                "records": records,
+                "frame": frame,
+                "raw_bytes": raw_bytes,
+                "search_index": build_search_index(frame[[c for c in SEARCH_COLUMNS if c in frame.columns]]) if records else None,
+                "views": {},
+                "figures": {},
+                "brightness": bundle["brightness"] if bundle is not None else {},
+                "scope": scope,
+                "uploads": uploads
+            }
+        save_snapshot(key, bundle)
+    return bundle
+
+
+def update_snapshot(key, version, figures=None, brightness=None, views=None):
+    # Sessions add to the same bundle concurrently, so merge into the file under
+    # the bundle's lock instead of writing back this session's whole copy
+    with file_lock(snapshot_path(key)):
+        current = load_snapshot(key)
+        if current is None:
+            return
+        if figures and current["version"] == version:
+            current["figures"].update(figures)
+        if views and current["version"] == version:
+            current["views"].update(views)
+            for name in list(current["views"])[:-SNAPSHOT_VIEWS]:
+                del current["views"][name]
+        if brightness:
+            current["brightness"].update(brightness)
+        save_snapshot(key, current)
+
+
+FILTERED_FIGURES = 64  # filter-specific figures kept in memory per server
+
+
+def _figure_png(fig):
+    buffer = BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+@st.cache_data(max_entries=FILTERED_FIGURES, show_spinner=False)
+def _filtered_figure(name, frame_hash, _render):
+    return _figure_png(_render())
+
+
+def snapshot_figure(key, bundle, name, frame, render, shared=True):
+    # Only the unfiltered view is shared by every viewer, so only it is persisted;
+    # filter combinations are unbounded and go to a capped in-memory cache instead
+    if not shared:
+        return _filtered_figure(name, int(pd.util.hash_pandas_object(frame, index=False).sum()), render)
+    if name not in bundle["figures"]:
+        bundle["figures"][name] = _figure_png(render())
+        update_snapshot(key, bundle["version"], figures={name: bundle["figures"][name]})
+    return bundle["figures"][name]
+
+
+def chart_spec(chart, **datasets):
+    # Vega-Lite spec for st.vega_lite_chart, validated once by Altair; the chart is built
+    # on alt.NamedData and the frames ride along as named datasets (shipped as Arrow)
+    spec = chart.to_dict()
+    spec.pop("config", None)  # Altair's default theme; Streamlit applies its own
+    spec["datasets"] = datasets
+    return spec
+
+
+def snapshot_view(bundle, name, build, shared=True, local=False):
+    # Tables, KPIs and chart specs of the unfiltered view are the same for every viewer,
+    # so they are built once per version and served from the bundle; filtered ones are
+    # built per rerun. Views bucketed by wall-clock time are kept per viewer timezone.
+    if not shared:
+        return build()
+    if local:
+        name = (name, viewer_timezone())
+    if name not in bundle["views"]:
+        bundle["views"][name] = build()
+        bundle.setdefault("unsaved", {})[name] = bundle["views"][name]
+    return bundle["views"][name]
+
+
+def save_views(key, bundle):
+    # Every view a rerun built is merged into the file in one write
+    if bundle.get("unsaved"):
+        update_snapshot(key, bundle["version"], views=bundle.pop("unsaved"))
+
+
+# ---------------- STRATIFIED SAMPLING ----------------
+# Uploads are listed newest first, so equal slices of the playlist are upload-time strata
+SAMPLE_STRATA = 20
+BOOTSTRAP_ROUNDS = 400
+LATEST_VIDEOS = 120
+SETTLED_DAYS = 30  # older videos' numbers barely move, so stale-snapshot refreshes keep them
+
+
+def listing_units(n_uploads):
+    return -(-n_uploads // 50)
+
+
+def budget_sample_size(budget, n_uploads):
+    # The budget first pays for listing every upload; the rest buys stats, 50 videos a unit
+    return max(budget - listing_units(n_uploads), 0) * 50
+
+
+def stratified_sample(uploads, sample_size, strata=SAMPLE_STRATA, seed=0):
+    # Each stratum takes its videos with the smallest seeded hash of the VideoID, so a
+    # bigger budget always contains the smaller sample (progressive upgrade), and new
+    # uploads nudging the stratum bounds leave almost all of the sample in place
+    n_uploads = len(uploads)
+    if n_uploads == 0:
+        return np.empty(0, dtype=int), np.empty(0, dtype="int16"), np.empty(0, dtype=int)
+    bounds = np.linspace(0, n_uploads, min(strata, n_uploads) + 1).astype(int)
+    sizes = np.diff(bounds)
+    rank = pd.util.hash_array(np.asarray(uploads, dtype=object), hash_key=f"{seed:016d}")
+    positions, stratum = [], []
+    for h, (start, size) in enumerate(zip(bounds[:-1], sizes)):
+        take = min(size, max(2, round(sample_size * size / n_uploads)))
+        positions.append(start + np.argsort(rank[start:start + size], kind="stable")[:take])
+        stratum.append(np.full(take, h, dtype="int16"))
+
+    return np.concatenate(positions), np.concatenate(stratum), sizes
+
+
+def attach_weights(records, stratum_of, stratum_sizes):
+    # Weight = videos in the stratum / videos actually fetched from it
+    # (deleted or private videos drop out of the fetch)
+    fetched = pd.Series([stratum_of[r["VideoID"]] for r in records]).value_counts()
+    return [
+        dict(r, Stratum=stratum_of[r["VideoID"]],
+             Weight=stratum_sizes[stratum_of[r["VideoID"]]] / fetched[stratum_of[r["VideoID"]]])
+        for r in records
+    ]
+
+
+def reusable_records(bundle, force=False):
+    # Records a whole-channel refresh need not fetch again: all of them while the
+    # bundle is fresh (only the budget changed), settled videos once it is stale
+    if bundle is None or force:
+        return {}
+    fresh = not snapshot_is_stale(bundle)
+    cutoff = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() - SETTLED_DAYS * 86400))
+    return {r["VideoID"]: r for r in bundle["records"] if fresh or r["Published"] < cutoff}
+
+
+def fetch_sampled_records(uploads, sample_size, youtube, reuse=None):
+    positions, stratum, stratum_sizes = stratified_sample(uploads, sample_size)
+    stratum_of = {uploads[p]: h for p, h in zip(positions, stratum)}
+
+    # Only videos not already in the snapshot cost quota
+    reuse = reuse or {}
+    records = [reuse[v] for v in stratum_of if v in reuse]
+    records += get_video_stats([v for v in stratum_of if v not in reuse], youtube)
+    return attach_weights(records, stratum_of, stratum_sizes)
+
+
+def _weighted_share(numerator, denominator):
+    return numerator / np.where(denominator > 0, denominator, np.nan) * 100
+
+
+BOOTSTRAP_BLOCK = 1 << 21  # resampled positions per block, whatever the rounds or sample size
+
+
+def bootstrap_sums(strata, rounds, seed, values, groups=None):
+    # Per-round weighted sums under a bootstrap within strata (strata must be sorted).
+    # A resample is a draw count per video, so a block of rounds is a (rounds, videos)
+    # count matrix times values (videos, measures); blocks keep memory flat in rounds.
+    # Returns (rounds + 1, measures), or (rounds + 1, groups, measures) when groups
+    # gives a code per video. Row 0 = the point estimate (every video counted once).
+    n = len(strata)
+    starts = np.flatnonzero(np.r_[True, strata[1:] != strata[:-1]])
+    sizes = np.diff(np.r_[starts, n])
+    per_block = max(1, BOOTSTRAP_BLOCK // max(n, 1))
+    if groups is not None:
+        order = np.argsort(groups, kind="stable")
+        bounds = np.flatnonzero(np.r_[True, groups[order][1:] != groups[order][:-1]])
+
+    def block_sums(counts):
+        if groups is None:
+            return counts @ values
+        counts = counts[:, order]
+        return np.stack([np.add.reduceat(counts * column, bounds, axis=1) for column in values[order].T], axis=2)
+
+    rng = np.random.default_rng(seed)
+    sums = [block_sums(np.ones((1, n)))]
+    for done in range(0, rounds, per_block):
+        block = min(per_block, rounds - done)
+        index = np.concatenate([
+            int(start) + rng.integers(0, size, size=(block, size), dtype="int32")
+            for start, size in zip(starts, sizes)
+        ], axis=1)
+        keys = (np.arange(block, dtype="int64")[:, None] * n + index).ravel()
+        sums.append(block_sums(np.bincount(keys, minlength=block * n).reshape(block, n).astype("float64")))
+    return np.concatenate(sums)
+
+
+@st.cache_data(show_spinner=False)
+def stratified_estimates(frame, rounds=BOOTSTRAP_ROUNDS, seed=0):
+    frame = frame.sort_values(by="Stratum", kind="stable").reset_index(drop=True)
+    w = frame["Weight"].to_numpy(dtype="float64")
+    wv = w * frame["Views"].to_numpy(dtype="float64")
+    short = (frame["Type"].astype(str) == "Short").to_numpy()
+    codes, categories = pd.factorize(frame["Category"].astype(str))
+
+    # Columns: weight, views, engagement, Shorts weight, Shorts views, then views per category
+    values = np.column_stack([
+        w, wv, w * frame["Engagement (%)"].to_numpy(dtype="float64"), w * short, wv * short,
+        wv[:, None] * (codes[:, None] == np.arange(len(categories)))
+    ])
+    sums = bootstrap_sums(frame["Stratum"].to_numpy(), rounds, seed, values)
+    total_w, total_views, engagement, short_w, short_views = sums[:, :5].T
+
+    estimates = {
+        "Total Views": total_views,
+        "Avg Views": total_views / total_w,
+        "Avg Engagement (%)": engagement / total_w,
+        "Shorts Share (%)": _weighted_share(short_w, total_w),
+        "Avg Views (Shorts)": short_views / np.where(short_w > 0, short_w, np.nan),
+        "Avg Views (Long)": (total_views - short_views) / np.where(total_w - short_w > 0, total_w - short_w, np.nan),
+    }
+    for i, category in enumerate(categories):
+        estimates[f"Views Share: {category} (%)"] = _weighted_share(sums[:, 5 + i], total_views)
+
+    return pd.DataFrame([
+        {
+            "KPI": kpi,
+            "Estimate": values[0],
+            "95% CI Low": np.nanpercentile(values[1:], 2.5),
+            "95% CI High": np.nanpercentile(values[1:], 97.5)
+        }
+        for kpi, values in estimates.items()
+    ])
+
+
+@st.cache_data(show_spinner=False)
+def stratified_monthly_trend(frame, rounds=BOOTSTRAP_ROUNDS, seed=0):
+    # Same within-strata bootstrap, aggregated to estimated uploads/views per month
+    frame = frame.dropna(subset=["Published"]).sort_values(by="Stratum", kind="stable").reset_index(drop=True)
+    codes, months = pd.factorize(wall_clock(frame["Published"]).dt.to_period("M"), sort=True)
+    w = frame["Weight"].to_numpy(dtype="float64")
+
+    values = np.column_stack([w, w * frame["Views"].to_numpy(dtype="float64")])
+    sums = bootstrap_sums(frame["Stratum"].to_numpy(), rounds, seed, values, groups=codes)
+    uploads, month_views = sums[..., 0], sums[..., 1]
+
+    return pd.DataFrame({
+        "Month": months.astype(str),
+        "Uploads": uploads[0],
+        "Views": month_views[0],
+        "Views Low": np.percentile(month_views[1:], 2.5, axis=0),
+        "Views High": np.percentile(month_views[1:], 97.5, axis=0)
+    })
+
+
+# ---------------- UPLOAD SCHEDULE ----------------
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
+
+@st.cache_data(show_spinner=False)
+def upload_schedule(frame):
+    # 7 x 24 aggregate built with one bincount per measure over day*24 + hour bins
+    frame = frame.dropna(subset=["Published"])
+    local = wall_clock(frame["Published"])
+    bins = (local.dt.dayofweek * 24 + local.dt.hour).to_numpy()
+
+    uploads = np.bincount(bins, minlength=7 * 24)
+    views = np.bincount(bins, weights=frame["Views"].to_numpy(dtype="float64"), minlength=7 * 24)
+    engagement = np.bincount(bins, weights=frame["Engagement (%)"].to_numpy(dtype="float64"), minlength=7 * 24)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return pd.DataFrame({
+            "Day": np.repeat(WEEKDAYS, 24),
+            "Hour": np.tile(np.arange(24), 7),
+            "Uploads": uploads,
+            "Avg Views": np.where(uploads > 0, views / uploads, np.nan),
+            "Avg Engagement (%)": np.where(uploads > 0, engagement / uploads, np.nan)
+        })
+
+
 # ---------------- DASHBOARD ----------------
 if st.session_state.start_dashboard:
 
-    youtube = build("youtube", "v3", developerKey=st.session_state.api_key)
-
-    channel_id = extract_channel_id(st.session_state.channel_url, youtube)
+    channel_id = extract_channel_id(st.session_state.channel_url, st.session_state.api_key)
     if not channel_id:
         st.error("❌ Invalid YouTube Channel URL.")
         st.stop()
 
-    playlist_id, channel_name, stats, channel_logo = get_uploads_playlist_id(channel_id, youtube)
+    youtube = build_youtube(st.session_state.api_key)
+
+    force_refresh = st.sidebar.button("🔄 Refresh data")
+
+    # ---- Scope: latest uploads, or the whole channel within a quota budget ----
+    st.sidebar.header("📐 Scope")
+    whole_channel = st.sidebar.radio("Analyze", [f"Latest {LATEST_VIDEOS} videos", "Whole channel"]) == "Whole channel"
+    snapshot_id = snapshot_key(channel_id, "sampled" if whole_channel else "latest")
+    bundle = load_snapshot(snapshot_id)
+    if whole_channel:
+        if "quota_budget" not in st.session_state:
+            st.session_state.quota_budget = 40
+        listing = listing_units(len(bundle["uploads"])) if bundle is not None else 0
+
+        def upgrade_sample(listing):
+            # Doubles what is left for stats; listing costs the same either way
+            st.session_state.quota_budget = listing + 2 * max(st.session_state.quota_budget - listing, 1)
+
+        st.sidebar.number_input("Quota budget (units)", min_value=1, max_value=100_000, key="quota_budget")
+        st.sidebar.button("⬆ Double the sample", on_click=upgrade_sample, args=(listing,))
+        st.sidebar.caption("The budget first lists every upload (1 unit per 50 uploads); the rest fetches stats, 1 unit per 50 sampled videos.")
+        scope = ("sampled", st.session_state.quota_budget)
+    else:
+        scope = ("latest", LATEST_VIDEOS)
+
+    servable = snapshot_serves(bundle, scope)
+    if not servable or force_refresh or snapshot_is_stale(bundle):
+        # One session refreshes a snapshot at a time. A stale bundle keeps being served
+        # meanwhile; with nothing to serve (or on Refresh) sessions wait for the lock.
+        with file_lock(snapshot_path(snapshot_id) + ".refresh", blocking=not servable or force_refresh) as refreshing:
+            latest = load_snapshot(snapshot_id) if refreshing else None
+            if refreshing and not force_refresh and snapshot_serves(latest, scope) and not snapshot_is_stale(latest):
+                # Another session finished the refresh while this one waited
+                bundle = latest
+            elif refreshing:
+                bundle = latest or bundle
+                if not force_refresh and snapshot_serves(bundle, scope):
+                    # A stale whole-channel bundle is refreshed at its own (larger) budget
+                    scope = bundle["scope"]
+
+                channel = get_uploads_playlist_id(channel_id, youtube)
+                if channel[0] is None:
+                    st.error("❌ Channel not found.")
+                    st.stop()
+
+                if scope[0] == "latest":
+                    uploads = None
+                    records = get_video_stats(get_videos_from_playlist(channel[0], youtube, LATEST_VIDEOS), youtube)
+                else:
+                    previous = bundle if bundle is not None and bundle.get("uploads") else None
+                    n_uploads = len(previous["uploads"]) if previous else int(channel[2].get("videoCount", 0))
+                    if listing_units(n_uploads) >= scope[1]:
+                        st.error(f"❌ Listing all {n_uploads:,} uploads costs {listing_units(n_uploads)} units — raise the quota budget above that.")
+                        st.stop()
+
+                    # The saved upload list only pages in uploads added since; a budget change
+                    # on a fresh bundle reuses it as is
+                    if previous is not None and not force_refresh and not snapshot_is_stale(previous):
+                        uploads = previous["uploads"]
+                    else:
+                        uploads = get_videos_from_playlist(channel[0], youtube, None, known=previous["uploads"] if previous else None)
+                    if not uploads:
+                        st.warning("⚠ This channel has no public uploads to analyze.")
+                        st.stop()
+                    records = fetch_sampled_records(
+                        uploads, budget_sample_size(scope[1], len(uploads)), youtube, reusable_records(previous, force_refresh)
+                    )
+
+                bundle = refresh_snapshot(snapshot_id, bundle, channel, records, scope=scope, uploads=uploads)
+
+    if not bundle["records"]:
+        st.warning("⚠ This channel has no public uploads to analyze.")
+        st.stop()
+
+    playlist_id, channel_name, stats, channel_logo = bundle["channel"]
+    st.sidebar.caption(
+        f"Snapshot `{bundle['version']}` · checked "
+        f"{int((time.time() - bundle['checked']) // 60)} min ago"
+    )
     
     col_logo, col_title = st.columns([1,5])
 
@@ -260,25 +1550,46 @@ if st.session_state.start_dashboard:
     with col_title:
       st.title(f"{channel_name}")
 
-    
-    video_ids = get_videos_from_playlist(playlist_id, youtube, 120)
-    df = pd.DataFrame(get_video_stats(video_ids, youtube))
-    
 
-    # ----- Add category mapping after dataframe creation -----
+    # Compact frame, Viral Score and search index come derived with the snapshot;
+    # only the viewer's timezone is applied here
+    df = bundle["frame"].assign(Published=bundle["frame"]["Published"].dt.tz_convert(viewer_timezone()))
+    raw_bytes = bundle["raw_bytes"]
 
-    CATEGORY_MAP = {
-    "1": "Film & Animation", "2": "Autos & Vehicles", "10": "Music",
-    "15": "Pets & Animals", "17": "Sports", "19": "Travel & Events",
-    "20": "Gaming", "22": "People & Blogs", "23": "Comedy",
-    "24": "Entertainment", "25": "News & Politics", "26": "How-to & Style",
-    "27": "Education", "28": "Science & Tech", "29": "Nonprofits"
-}
+    # ---- Search & Filters ----
+    channel_df = df
+    search_index = bundle["search_index"]
 
-    df["Category"] = df["CategoryID"].astype(str).map(CATEGORY_MAP).fillna("Unknown")
+    st.sidebar.header("🔎 Search & Filter")
+    query = st.sidebar.text_input("Search titles" + (" & tags" if "Tags" in df.columns else ""))
+
+    published = df["Published"].dropna()
+    date_range = st.sidebar.date_input(
+        "Published between",
+        (published.min().date(), published.max().date())
+    ) if len(published) else ()
 
+    types = st.sidebar.multiselect("Type", sorted(df["Type"].astype(str).unique()))
+    categories = st.sidebar.multiselect("Category", sorted(df["Category"].astype(str).unique()))
+    min_views = st.sidebar.number_input("Minimum views", min_value=0, value=0, step=1000)
 
-    def generate_pdf(df, channel_name, total_views, subscribers, total_videos):
+    df = filter_videos(
+        df, search_index, query,
+        date_range=date_range if len(date_range) == 2 else None,
+        types=types, categories=categories, min_views=min_views
+    )
+    # Names the filtered view for caches keyed on it, so they never hash the frames
+    filter_key = (query.strip(), tuple(date_range), tuple(types), tuple(categories), min_views, viewer_timezone())
+    # The unfiltered view is served from the snapshot's stored views
+    full_view = df is channel_df
+    st.sidebar.caption(f"Showing **{len(df):,}** of **{len(channel_df):,}** videos")
+
+    if df.empty:
+        st.warning("⚠ No videos match the current search and filters.")
+        st.stop()
+
+
+    def generate_pdf(df, channel_name, total_views, subscribers, total_videos, sample_label=""):
         temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
         pdf_path = temp_file.name
     
@@ -295,8 +1606,8 @@ if st.session_state.start_dashboard:
 
     # ------ KPI Section ------
         c.setFont("Helvetica", 12)
-        c.drawString(60, height - 140, f"Total Videos: {total_videos}")
-        c.drawString(60, height - 160, f"Total Views: {total_views:,}")
+        c.drawString(60, height - 140, f"Total Videos{sample_label}: {total_videos}")
+        c.drawString(60, height - 160, f"Total Views{sample_label}: {total_views:,}")
         c.drawString(60, height - 180, f"Subscribers: {subscribers}")
 
     # ------ Top Video ------
@@ -319,12 +1630,7 @@ if st.session_state.start_dashboard:
 
 
     # ---- KPI ----
-    total_videos = len(df)
-    total_views = df["Views"].sum()
     subscribers = stats.get("subscriberCount", "Hidden")
-    avg_views = int(df["Views"].mean()) if total_videos > 0 else 0
-    avg_engagement = round(df["Engagement (%)"].mean(), 2)
-    top_video = df.sort_values(by="Views", ascending=False).iloc[0]["Title"]
 
 
     def format_number(num):
@@ -339,19 +1645,88 @@ if st.session_state.start_dashboard:
         )
 
 
+    # Unfiltered whole-channel view: every KPI comes from the same weighted estimator.
+    # With filters active the KPIs describe the matching sampled videos and say so.
+    sampled = scope[0] == "sampled" and len(channel_df) < len(bundle["uploads"])
+    sample_label = " (sample)" if sampled and not full_view else ""
+    if sampled:
+        estimates = snapshot_view(bundle, "estimates", lambda: stratified_estimates(
+            channel_df[["Stratum", "Weight", "Views", "Engagement (%)", "Type", "Category"]]
+        ))
+
+    def build_kpis():
+        kpis = {
+            "Total Videos": len(df),
+            "Total Views": int(df["Views"].sum()),
+            "Avg Views": int(df["Views"].mean()),
+            "Avg Engagement": round(float(df["Engagement (%)"].mean()), 2),
+            "Top Video": df.sort_values(by="Views", ascending=False).iloc[0]["Title"]
+        }
+        if sampled and full_view:
+            estimate = estimates.set_index("KPI")["Estimate"]
+            kpis.update({
+                "Total Videos": len(bundle["uploads"]),
+                "Total Views": int(estimate["Total Views"]),
+                "Avg Views": int(estimate["Avg Views"]),
+                "Avg Engagement": round(float(estimate["Avg Engagement (%)"]), 2)
+            })
+        return kpis
+
+    kpis = snapshot_view(bundle, "kpis", build_kpis, full_view)
+    total_videos, total_views, avg_views = kpis["Total Videos"], kpis["Total Views"], kpis["Avg Views"]
+    avg_engagement, top_video = kpis["Avg Engagement"], kpis["Top Video"]
+
     subscribers_display = format_number(subscribers)
 
     k1, k2, k3, k4, k5, k6 = st.columns(6)
-    k1.metric(" Total Videos", format_number(total_videos))
-    k2.metric(" Total Views", format_number(total_views))
+    k1.metric(" Total Videos" + sample_label, format_number(total_videos))
+    k2.metric(" Total Views" + sample_label, format_number(total_views))
     k3.metric("Subscribers", subscribers_display)
-    k4.metric(" Avg Views", format_number(avg_views))
-    k5.metric(" Engagement", f"{avg_engagement}%")
-    k6.metric(" Top Video", top_video)
+    k4.metric(" Avg Views" + sample_label, format_number(avg_views))
+    k5.metric(" Engagement" + sample_label, f"{avg_engagement}%")
+    k6.metric(" Top Video" + (" (in sample)" if sampled else ""), top_video)
+
+    if sampled:
+        st.info(
+            f"📐 Approximate mode: stats for **{len(channel_df):,}** of **{len(bundle['uploads']):,}** uploads "
+            f"({SAMPLE_STRATA} upload-time strata). "
+            + ("Filters are active, so the KPIs above are plain values over the matching sampled videos"
+               if sample_label else "The KPIs above are weighted channel-wide estimates")
+            + "; the tabs below show the sampled videos."
+        )
+        import altair as alt
+
+        with st.expander("📐 Channel-wide estimates with 95% confidence intervals", expanded=True):
+            st.dataframe(
+                estimates.style.format({"Estimate": "{:,.2f}", "95% CI Low": "{:,.2f}", "95% CI High": "{:,.2f}"}),
+                use_container_width=True
+            )
+
+            def build_trend():
+                trend = stratified_monthly_trend(channel_df[["Stratum", "Weight", "Views", "Published"]])
+                band = alt.Chart(alt.NamedData("trend")).mark_area(opacity=0.3, color="#00c3ff").encode(
+                    x=alt.X("Month:N", title="Month"),
+                    y=alt.Y("Views Low:Q", title="Estimated Views"),
+                    y2="Views High:Q"
+                )
+                line = alt.Chart(alt.NamedData("trend")).mark_line(color="#00c3ff").encode(
+                    x="Month:N",
+                    y="Views:Q",
+                    tooltip=[
+                        alt.Tooltip("Month:N"),
+                        alt.Tooltip("Views:Q", format=",.0f"),
+                        alt.Tooltip("Views Low:Q", format=",.0f"),
+                        alt.Tooltip("Views High:Q", format=",.0f"),
+                        alt.Tooltip("Uploads:Q", format=",.0f", title="Est. Uploads")
+                    ]
+                )
+                return chart_spec((band + line).properties(height=300, title="Estimated Monthly Views (95% CI)"), trend=trend)
+
+            st.vega_lite_chart(snapshot_view(bundle, "monthly_trend", build_trend, local=True), use_container_width=True)
 
 
     # -------- Tabs --------
-    tab1, tab2, tab3, tab4, tab5,tab6 ,tab7,tab8,tab9 ,tab10= st.tabs([
+    tab1, tab2, tab3, tab4, tab5,tab6 ,tab7,tab8,tab9 ,tab10,tab11= st.tabs([
         "📄 Video Table",
         "📈 Charts",
         "🏆 Top Videos",
@@ -361,15 +1736,30 @@ if st.session_state.start_dashboard:
         "🧠 Insights Matrix",
         "🖼 Thumbnails",
         "⬇ Download",
-        "🎯 Single Video Deep-Dive" 
+        "🎯 Single Video Deep-Dive",
+        "🌐 Peer Benchmark"
          
         
     ])
 
     with tab1:
-      st.dataframe(df, use_container_width=True)
+      st.dataframe(snapshot_view(bundle, "video_table", lambda: with_urls(df), full_view, local=True), use_container_width=True)
       import altair as alt
 
+      with st.expander("🧮 Memory Footprint"):
+        footprint = snapshot_view(bundle, "footprint", lambda: memory_footprint(channel_df))
+        compact_bytes = int(footprint["Bytes"].sum())
+        st.caption(
+            f"As fetched: **{raw_bytes / 1024:.1f} KB** → Compact: **{compact_bytes / 1024:.1f} KB** "
+            f"({raw_bytes / max(compact_bytes, 1):.1f}× smaller)"
+        )
+        st.dataframe(footprint, use_container_width=True)
+
+      with st.expander("📡 API Transport"):
+        st.json(get_transport().metrics.snapshot())
+        st.write("Payload per endpoint (field-projected responses, decoded JSON size)")
+        st.dataframe(get_transport().metrics.payload_report(), use_container_width=True)
+
     
 
     with tab2:
@@ -378,17 +1768,23 @@ if st.session_state.start_dashboard:
    
      import altair as alt
 
-     df["Views_M"] = df["Views"] / 1_000_000  
-     df["Likes_K"] = df["Likes"] / 1_000     
-
-     st.subheader("Views vs Likes Trend")
+     category_colors = {
+    "Music": "#A020F0",       
+    "Trailer": "#2979FF",    
+    "Shorts": "#FFD300",      
+    "Entertainment": "#FF6D00", 
+    "Unknown": "#9E9E9E"      
+}
 
-     base = alt.Chart(df.reset_index()).encode(
-     x=alt.X("index:Q", title="Video Number")
+     def build_charts():
+      base = alt.Chart(alt.NamedData("videos")).transform_calculate(
+      Views_M="datum.Views / 1000000",
+      Likes_K="datum.Likes / 1000"
+).encode(
+      x=alt.X("index:Q", title="Video Number")
 )
 
-    
-     views_line = base.mark_line(color="#00c3ff").encode(
+      views_line = base.mark_line(color="#00c3ff").encode(
     y=alt.Y("Views_M:Q", title="Views (Millions)"),
     tooltip=[
         alt.Tooltip("Title:N"),
@@ -397,23 +1793,71 @@ if st.session_state.start_dashboard:
     ]
 )
 
-    
-     likes_line = base.mark_line(color="#ff4dd2").encode(
-       y=alt.Y("Likes_K:Q", title="Likes (Thousands)", axis=alt.Axis(titleColor="#ff4dd2"))
+      likes_line = base.mark_line(color="#ff4dd2").encode(
+        y=alt.Y("Likes_K:Q", title="Likes (Thousands)", axis=alt.Axis(titleColor="#ff4dd2"))
+)
+
+      top10 = df.sort_values(by="Views", ascending=False).head(10).reset_index(drop=True)
+
+      top10_chart = alt.Chart(alt.NamedData("top10")).mark_bar().encode(
+        x=alt.X("Title:N", sort="-y", title="Video Title"),
+        y=alt.Y("Views:Q", title="Views (Millions)", scale=alt.Scale(domain=[0, int(top10['Views'].max())])),
+        color=alt.Color("Category:N", scale=alt.Scale(domain=list(category_colors.keys()),
+                                                   range=list(category_colors.values())),
+                     legend=alt.Legend(title="Content Type")),
+      tooltip=[
+        alt.Tooltip("Title:N"),
+        alt.Tooltip("Views:Q", format=",.0f"),
+        alt.Tooltip("Category:N")
+    ]
+).properties(height=400)
+
+      scatter = alt.Chart(alt.NamedData("videos")).mark_circle(size=100,color="#0CBFFBFF" ).encode(
+         x='Duration (mins):Q',
+         y='Views:Q',
+         tooltip=['Title:N', 'Views:Q', 'Duration (mins):Q']
+     ).interactive()
+
+      month = wall_clock(df["Published"]).dt.to_period("M").rename("Month")
+      monthly_uploads = df["VideoID"].groupby(month).count().reset_index()
+      monthly_uploads["Month"] = monthly_uploads["Month"].astype(str)
+
+      monthly_chart = alt.Chart(alt.NamedData("monthly_uploads")).mark_bar(color="#E738E7FF").encode(
+      x=alt.X("Month:N", title="Month"),  
+      y=alt.Y("VideoID:Q", title="Uploads"),
+      tooltip=[
+        alt.Tooltip("Month:N", title="Month"),
+        alt.Tooltip("VideoID:Q", title="Uploaded Videos"),
+    ]
+).properties(
+       width="container",
+       height=350,
+     
 )
 
-     chart = alt.layer(views_line, likes_line).resolve_scale(
-      y='independent'
-).properties(height=350)
+      videos = df[["Title", "Views", "Likes", "Duration (mins)"]].reset_index()
+      return {
+        "Views vs Likes": chart_spec(alt.layer(views_line, likes_line).resolve_scale(y='independent').properties(height=350), videos=videos),
+        "Correlation": round(float(df["Views"].corr(df["Likes"])), 2),
+        "Top Video": df.iloc[df["Views"].idxmax()]["Title"],
+        "Avg Views (M)": df["Views"].mean() / 1_000_000,
+        "Avg Likes (K)": df["Likes"].mean() / 1_000,
+        "Top 10": chart_spec(top10_chart, top10=top10),
+        "Top Category": top10.groupby("Category", observed=True)["Views"].sum().idxmax(),
+        "Duration vs Views": chart_spec(scatter, videos=videos),
+        "Best Length": df.loc[df["Views"].idxmax(), "Duration (mins)"],
+        "Monthly Uploads": chart_spec(monthly_chart, monthly_uploads=monthly_uploads),
+        "Most Active Month": monthly_uploads.loc[monthly_uploads["VideoID"].idxmax(), "Month"]
+      }
+
+     charts = snapshot_view(bundle, "charts", build_charts, full_view, local=True)
 
-     st.altair_chart(chart, use_container_width=True)
+     st.subheader("Views vs Likes Trend")
+     st.vega_lite_chart(charts["Views vs Likes"], use_container_width=True)
 
 
      
-     corr = round(df["Views"].corr(df["Likes"]), 2)
-     top_video = df.iloc[df["Views"].idxmax()]["Title"]
-     avg_views = df["Views_M"].mean()
-     avg_likes = df["Likes_K"].mean()
+     corr = charts["Correlation"]
 
      st.markdown(
     f"""
@@ -423,101 +1867,67 @@ if st.session_state.start_dashboard:
       → {"Strong engagement " if corr > 0.6 else "Weak engagement — content response varies "}
 
     -  Top performing video:  
-      **“{top_video[:50]}...”**
+      **“{charts["Top Video"][:50]}...”**
 
     -  Average Metrics:  
-       Avg Views: **{avg_views:.2f}M** | Avg Likes: **{avg_likes:.1f}K**
+       Avg Views: **{charts["Avg Views (M)"]:.2f}M** | Avg Likes: **{charts["Avg Likes (K)"]:.1f}K**
     """
 )
      st.divider()
 
-    
-     
-     category_colors = {
-    "Music": "#A020F0",       
-    "Trailer": "#2979FF",    
-    "Shorts": "#FFD300",      
-    "Entertainment": "#FF6D00", 
-    "Unknown": "#9E9E9E"      
-}
-
-     df["Color"] = df["Category"].apply(lambda c: category_colors.get(c, "#9E9E9E"))
-
-
 
      st.subheader("Top 10 Most Viewed Videos")
-     top10 = df.sort_values(by="Views", ascending=False).head(10).reset_index(drop=True)
-     import altair as alt
-
-     chart = alt.Chart(top10).mark_bar().encode(
-       x=alt.X("Title:N", sort="-y", title="Video Title"),
-       y=alt.Y("Views:Q", title="Views (Millions)", scale=alt.Scale(domain=[0, top10['Views'].max()])),
-       color=alt.Color("Category:N", scale=alt.Scale(domain=list(category_colors.keys()),
-                                                  range=list(category_colors.values())),
-                    legend=alt.Legend(title="Content Type")),
-     tooltip=[
-        alt.Tooltip("Title:N"),
-        alt.Tooltip("Views:Q", format=",.0f"),
-        alt.Tooltip("Category:N")
-    ]
-).properties(height=400)
+     st.vega_lite_chart(charts["Top 10"], use_container_width=True)
 
-     st.altair_chart(chart, use_container_width=True)
-
-
-     top_cat = top10.groupby("Category")["Views"].sum().idxmax()
-     st.markdown(f"💡 **Insight:** Most top-performing videos belong to **`{top_cat}`** category — meaning audience strongly prefers this type of content.")
+     st.markdown(f"💡 **Insight:** Most top-performing videos belong to **`{charts['Top Category']}`** category — meaning audience strongly prefers this type of content.")
 
 
 
     
      st.write("⏳ Duration vs Views")
-     scatter = alt.Chart(df).mark_circle(size=100,color="#0CBFFBFF" ).encode(
-        x='Duration (mins):Q',
-        y='Views:Q',
-        tooltip=['Title', 'Views', 'Duration (mins)']
-    ).interactive()
-     st.altair_chart(scatter, use_container_width=True)
+     st.vega_lite_chart(charts["Duration vs Views"], use_container_width=True)
 
-    
-     optimal_len = df.loc[df["Views"].idxmax(), "Duration (mins)"]
-     st.markdown(f" **Best performing video length:** Around **`{optimal_len} minutes`**.")
+     st.markdown(f" **Best performing video length:** Around **`{charts['Best Length']} minutes`**.")
 
      st.divider()
 
     
      st.write("📅 Monthly Upload Trend")
+     st.vega_lite_chart(charts["Monthly Uploads"], use_container_width=True)
 
-   
-     df["Published"] = pd.to_datetime(df["Published"], errors="coerce")
-     df = df.dropna(subset=["Published"])
-     df["Month"] = df["Published"].dt.to_period("M")
-
-
-     monthly_uploads = df.groupby("Month")["VideoID"].count().reset_index()
-
-
-     monthly_uploads["Month"] = monthly_uploads["Month"].astype(str)
+     st.markdown(f"📈 **Insight:** Most uploads were in **`{charts['Most Active Month']}`** — more uploads = higher consistency! 📆🚀")
+     st.divider()
 
 
-     import altair as alt
-     chart = alt.Chart(monthly_uploads).mark_bar(color="#E738E7FF").encode(
-     x=alt.X("Month:N", title="Month"),  
-     y=alt.Y("VideoID:Q", title="Uploads"),
-     tooltip=[
-        alt.Tooltip("Month:N", title="Month"),
-        alt.Tooltip("VideoID:Q", title="Uploaded Videos"),
-    ]
-).properties(
-      width="container",
-      height=350,
-     
-)
-     st.altair_chart(chart, use_container_width=True)
+     st.write(f"🗓 Upload Schedule Heatmap ({df['Published'].dt.tz})")
 
+     schedule = snapshot_view(bundle, "schedule", lambda: upload_schedule(df[["Published", "Views", "Engagement (%)"]]), full_view, local=True)
+     schedule_metric = st.radio("Color by", ["Uploads", "Avg Views", "Avg Engagement (%)"], horizontal=True)
 
-     most_active_month = monthly_uploads.loc[monthly_uploads["VideoID"].idxmax(), "Month"]
-     st.markdown(f"📈 **Insight:** Most uploads were in **`{most_active_month}`** — more uploads = higher consistency! 📆🚀")
+     def build_heatmap():
+      heatmap = alt.Chart(alt.NamedData("schedule")).mark_rect().encode(
+        x=alt.X("Hour:O", title="Hour of Day"),
+        y=alt.Y("Day:N", sort=WEEKDAYS, title="Day of Week"),
+        color=alt.Color(f"{schedule_metric}:Q", scale=alt.Scale(scheme="reds"), legend=alt.Legend(title=schedule_metric)),
+        tooltip=[
+           alt.Tooltip("Day:N"),
+           alt.Tooltip("Hour:O"),
+           alt.Tooltip("Uploads:Q"),
+           alt.Tooltip("Avg Views:Q", format=",.0f"),
+           alt.Tooltip("Avg Engagement (%):Q", format=".2f")
+       ]
+).properties(height=280)
+      return chart_spec(heatmap, schedule=schedule)
+
+     st.vega_lite_chart(snapshot_view(bundle, ("schedule_heatmap", schedule_metric), build_heatmap, full_view, local=True), use_container_width=True)
+
+     repeated_slots = schedule[schedule["Uploads"] >= 2]
+     if len(repeated_slots):
+       best_slot = repeated_slots.loc[repeated_slots["Avg Views"].idxmax()]
+       st.markdown(
+         f"⏰ **Insight:** Uploads on **{best_slot['Day']} around {int(best_slot['Hour']):02d}:00** "
+         f"average **{format_number(best_slot['Avg Views'])}** views — the best slot with 2+ uploads."
+     )
      st.divider()
 
 
@@ -526,15 +1936,21 @@ if st.session_state.start_dashboard:
 
      if "Category" in df.columns and not df["Category"].isna().all():
 
-      category_views = df.groupby("Category")["Views"].sum().sort_values(ascending=False)
+      category_views = snapshot_view(
+        bundle, "category_views",
+        lambda: df.groupby("Category", observed=True)["Views"].sum().sort_values(ascending=False), full_view
+      )
 
       if len(category_views) > 0:
           import matplotlib.pyplot as plt
 
-          fig, ax = plt.subplots()
-          ax.pie(category_views.values, labels=category_views.index, autopct="%1.1f%%")
-          ax.axis("equal")  
-          st.pyplot(fig)
+          def render_pie():
+            fig, ax = plt.subplots()
+            ax.pie(category_views.values, labels=category_views.index, autopct="%1.1f%%")
+            ax.axis("equal")
+            return fig
+
+          st.image(snapshot_figure(snapshot_id, bundle, "category_pie", category_views.reset_index(), render_pie, shared=full_view))
 
        
           top_cat = category_views.idxmax()
@@ -552,37 +1968,44 @@ if st.session_state.start_dashboard:
 
 
     with tab3:
-        
-        st.dataframe(df.sort_values(by="Views", ascending=False).head(5))
 
-   
-        st.subheader("🏆 Top Performing Videos")
+        import altair as alt
 
-    
-        top5 = df.sort_values(by="Views", ascending=False).head(5)
+        def build_top_videos():
+            top5 = with_urls(df.nlargest(5, "Views"))
+
+            top_chart = alt.Chart(alt.NamedData("top5")).mark_bar(color="#9670FF").encode(
+             x=alt.X("Views:Q", title="Views"),
+             y=alt.Y("Title:N", sort="-x", title="Video Title"),
+             tooltip=[
+                alt.Tooltip("Title:N", title="Video"),
+                alt.Tooltip("Views:Q", title="Views", format=","),
+                alt.Tooltip("Likes:Q", title="Likes", format=","),
+                alt.Tooltip("URL:N", title="Video URL")
+            ]
+        ).properties(
+             height=300,
+             title="🔥 Top 5 Most Viewed Videos"
+        )
+            return {
+                "Top Rows": df.sort_values(by="Views", ascending=False).head(5),
+                "Top 5": top5[["Title", "Views", "Likes", "Engagement (%)", "URL"]],
+                "Chart": chart_spec(top_chart, top5=top5[["Title", "Views", "Likes", "URL"]])
+            }
 
-    
-        import altair as alt
+        top_videos = snapshot_view(bundle, "top_videos", build_top_videos, full_view, local=True)
+        
+        st.dataframe(top_videos["Top Rows"])
 
-        top_chart = alt.Chart(top5).mark_bar(color="#9670FF").encode(
-         x=alt.X("Views:Q", title="Views"),
-         y=alt.Y("Title:N", sort="-x", title="Video Title"),
-         tooltip=[
-            alt.Tooltip("Title:N", title="Video"),
-            alt.Tooltip("Views:Q", title="Views", format=","),
-            alt.Tooltip("Likes:Q", title="Likes", format=","),
-            alt.Tooltip("URL:N", title="Video URL")
-        ]
-    ).properties(
-         height=300,
-         title="🔥 Top 5 Most Viewed Videos"
-    )
+   
+        st.subheader("🏆 Top Performing Videos")
 
-        st.altair_chart(top_chart, use_container_width=True)
+        st.vega_lite_chart(top_videos["Chart"], use_container_width=True)
 
     
         st.write("📋 Detail View:")
-        st.dataframe(top5[["Title", "Views", "Likes", "Engagement (%)", "URL"]], use_container_width=True)
+        top5 = top_videos["Top 5"]
+        st.dataframe(top5, use_container_width=True)
 
     
         top_vid_title = top5.iloc[0]["Title"]
@@ -602,7 +2025,7 @@ if st.session_state.start_dashboard:
         st.subheader("📄 Export Analytics Report")
 
         if st.button("📥 Generate PDF Report"):
-          pdf_path = generate_pdf(df, channel_name, total_views, subscribers, total_videos)
+          pdf_path = generate_pdf(df, channel_name, total_views, subscribers, total_videos, sample_label)
 
           with open(pdf_path, "rb") as f:
             st.download_button(
@@ -614,7 +2037,7 @@ if st.session_state.start_dashboard:
 
         
 
-          st.download_button("Download CSV", df.to_csv(index=False), "youtube_data.csv")
+          st.download_button("Download CSV", with_urls(df).to_csv(index=False), "youtube_data.csv")
 
     with tab8:
         
@@ -629,86 +2052,101 @@ if st.session_state.start_dashboard:
          stat = ImageStat.Stat(img)
          return stat.mean[0]
 
-        df["Thumbnail"] = df["VideoID"].apply(lambda x: f"https://i.ytimg.com/vi/{x}/hqdefault.jpg")
-        df["Brightness"] = df["Thumbnail"].apply(get_brightness)
-
-        chart = alt.Chart(df).mark_circle(size=90, color="#FF5722").encode(
-        x=alt.X("Brightness:Q", title="Thumbnail Brightness (0–255)"),
-        y=alt.Y("Views:Q", title="Views"),
-        tooltip=["Title", "Brightness", "Views"]
+        def build_brightness():
+          # Thumbnails only change with the video set, so brightness lives in the snapshot
+          missing = [vid for vid in df["VideoID"] if vid not in bundle["brightness"]]
+          if missing:
+            fetched = {vid: get_brightness(thumbnail_url(vid)) for vid in missing}
+            bundle["brightness"].update(fetched)
+            update_snapshot(snapshot_id, bundle["version"], brightness=fetched)
+          brightness = df["VideoID"].map(bundle["brightness"]).astype("float32")
+
+          chart = alt.Chart(alt.NamedData("thumbnails")).mark_circle(size=90, color="#FF5722").encode(
+          x=alt.X("Brightness:Q", title="Thumbnail Brightness (0–255)"),
+          y=alt.Y("Views:Q", title="Views"),
+          tooltip=["Title:N", "Brightness:Q", "Views:Q"]
 ).interactive()
+          return {
+            "Chart": chart_spec(chart, thumbnails=df[["Title", "Views"]].assign(Brightness=brightness)),
+            "Best Brightness": int(brightness[df["Views"].idxmax()])
+          }
+
+        thumbnails = snapshot_view(bundle, "brightness", build_brightness, full_view)
 
-        st.altair_chart(chart, use_container_width=True)
+        st.vega_lite_chart(thumbnails["Chart"], use_container_width=True)
 
-        best_brightness = int(df.loc[df["Views"].idxmax(), "Brightness"])
-        st.markdown(f"💡 **Insight:** Best-performing thumbnail brightness ~ `{best_brightness}`.")
+        st.markdown(f"💡 **Insight:** Best-performing thumbnail brightness ~ `{thumbnails['Best Brightness']}`.")
 
         st.subheader("🖼 Thumbnail Gallery")
         cols = st.columns(4)
 
-        for i, row in df.iterrows():
+        for i, (video_id, title) in enumerate(zip(df["VideoID"], df["Title"])):
             with cols[i % 4]:
-                thumbnail = f"https://i.ytimg.com/vi/{row['VideoID']}/hqdefault.jpg"
-                st.image(thumbnail, use_container_width=True)
-                st.markdown(f"[▶️ {row['Title'][:40]}]({row['URL']})")
+                st.image(thumbnail_url(video_id), use_container_width=True)
+                st.markdown(f"[▶️ {title[:40]}]({video_url(video_id)})")
     
 
 
     with tab4:
       st.subheader("📊 Shorts vs Long Video Performance")
 
-      shorts_data = df[df["Type"] == "Short"]
-      long_data = df[df["Type"] == "Long"]
+      import altair as alt
+
+      def build_shorts_long():
+        shorts_views = df.loc[df["Type"] == "Short", "Views"]
+        long_views = df.loc[df["Type"] == "Long", "Views"]
+
+        compare_df = pd.DataFrame({
+          "Type": ["Shorts", "Long Videos"],
+          "Count": [len(shorts_views), len(long_views)],
+          "Avg Views (M)": [
+              shorts_views.mean() / 1_000_000 if len(shorts_views) else 0,
+              long_views.mean() / 1_000_000 if len(long_views) else 0
+          ]
+      })
+
+        chart = alt.Chart(alt.NamedData("compare")).mark_bar(
+          cornerRadiusTopLeft=10,
+          cornerRadiusTopRight=10
+      ).encode(
+          x=alt.X("Type:N", title="Content Type"),
+          y=alt.Y("Avg Views (M):Q", title="Average Views (Millions)", scale=alt.Scale(zero=True)),
+          color=alt.Color("Type:N", scale=alt.Scale(
+              domain=["Shorts", "Long Videos"],
+              range=["#FFD300", "#4DA6FF"]  # Yellow for shorts, Blue for long
+          )),
+          tooltip=[
+              alt.Tooltip("Type:N"),
+              alt.Tooltip("Avg Views (M):Q", format=".2f", title="Avg Views (M)")
+          ]
+      ).properties(
+          height=350,
+          width=400,
+          title="📊 Average Views Comparison"
+      )
+        return compare_df, chart_spec(chart, compare=compare_df[["Type", "Avg Views (M)"]])
+
+      compare_df, compare_chart = snapshot_view(bundle, "shorts_long", build_shorts_long, full_view)
+      shorts_count, long_count = map(int, compare_df["Count"])
+      shorts_avg, long_avg = compare_df["Avg Views (M)"]
 
       colA, colB = st.columns(2)
 
       with colA:
-         st.metric("📱 Shorts Count", len(shorts_data))
-         st.metric("👁 Avg Views (Shorts)", f"{(shorts_data['Views'].mean()/1_000_000):.2f}M" if len(shorts_data) else "0")
+         st.metric("📱 Shorts Count", shorts_count)
+         st.metric("👁 Avg Views (Shorts)", f"{shorts_avg:.2f}M" if shorts_count else "0")
 
       with colB:
-         st.metric("📺 Long Videos Count", len(long_data))
-         st.metric("👁 Avg Views (Long)", f"{(long_data['Views'].mean()/1_000_000):.2f}M" if len(long_data) else "0")
+         st.metric("📺 Long Videos Count", long_count)
+         st.metric("👁 Avg Views (Long)", f"{long_avg:.2f}M" if long_count else "0")
 
     
-      compare_df = pd.DataFrame({
-        "Type": ["Shorts", "Long Videos"],
-        "Avg Views (M)": [
-            shorts_data["Views"].mean() / 1_000_000 if len(shorts_data) else 0,
-            long_data["Views"].mean() / 1_000_000 if len(long_data) else 0
-        ]
-    })
-
-    
-      import altair as alt
-
-      chart = alt.Chart(compare_df).mark_bar(
-        cornerRadiusTopLeft=10,
-        cornerRadiusTopRight=10
-    ).encode(
-        x=alt.X("Type:N", title="Content Type"),
-        y=alt.Y("Avg Views (M):Q", title="Average Views (Millions)", scale=alt.Scale(zero=True)),
-        color=alt.Color("Type:N", scale=alt.Scale(
-            domain=["Shorts", "Long Videos"],
-            range=["#FFD300", "#4DA6FF"]  # Yellow for shorts, Blue for long
-        )),
-        tooltip=[
-            alt.Tooltip("Type:N"),
-            alt.Tooltip("Avg Views (M):Q", format=".2f", title="Avg Views (M)")
-        ]
-    ).properties(
-        height=350,
-        width=400,
-        title="📊 Average Views Comparison"
-    )
-
-    
-      st.altair_chart(chart, use_container_width=True)
+      st.vega_lite_chart(compare_chart, use_container_width=True)
 
    
       insight = (
         " **Shorts are performing better in terms of average views. **"
-        if compare_df["Avg Views (M)"].iloc[0] > compare_df["Avg Views (M)"].iloc[1]
+        if shorts_avg > long_avg
         else " **Long videos attract more average views — audience prefers detailed content. 🎬**"
     )
 
@@ -717,51 +2155,93 @@ if st.session_state.start_dashboard:
     with tab5:
       st.subheader("🔥 Viral Score Analysis")
 
-   
-      df["Viral Score Raw"] = (
-         df["Views"] * 0.60 +
-         df["Likes"] * 0.30 +
-         df["Comments"] * 0.10
-    )
+      def build_viral():
+        top_viral = df.sort_values(by="Viral Score", ascending=False).head(10)
+
+        week = wall_clock(df["Published"]).dt.to_period("W").astype(str).rename("Week")
+        weekly_views = df["Views"].groupby(week).sum()
+
+        viral_chart = alt.Chart(alt.NamedData("top_viral")).mark_bar().encode(
+          x=alt.X("Title:N", title="Title"),
+          y=alt.Y("Viral Score:Q", title="Viral Score"),
+          tooltip=[alt.Tooltip("Title:N"), alt.Tooltip("Viral Score:Q", format=".2f")]
+      )
+        weekly_chart = alt.Chart(alt.NamedData("weekly_views")).mark_line().encode(
+          x=alt.X("Week:N", title="Week"),
+          y=alt.Y("Views:Q", title="Views"),
+          tooltip=[alt.Tooltip("Week:N"), alt.Tooltip("Views:Q", format=",.0f")]
+      )
+        return {
+          "Top Viral": top_viral[["Title", "Views", "Likes", "Comments", "Viral Score"]],
+          "Viral Chart": chart_spec(viral_chart, top_viral=top_viral[["Title", "Viral Score"]]),
+          "Weekly Views": weekly_views,
+          "Weekly Chart": chart_spec(weekly_chart, weekly_views=weekly_views.reset_index()),
+          "Avg Viral Score": float(df["Viral Score"].mean())
+        }
+
+      viral = snapshot_view(bundle, "viral", build_viral, full_view, local=True)
 
    
-      df["Viral Score"] = np.round((df["Viral Score Raw"] / df["Viral Score Raw"].max()) * 100, 2)
-
-    
       st.write("🏆 Top 10 Most Viral Videos")
-      st.dataframe(df.sort_values(by="Viral Score", ascending=False)[["Title", "Views", "Likes", "Comments", "Viral Score"]].head(10))
+      st.dataframe(viral["Top Viral"])
 
     
       
       st.write("⚡ Viral Score Distribution — Top 10 Videos")
 
-      top_viral = df.sort_values(by="Viral Score", ascending=False).head(10)
-
-      st.bar_chart(
-      top_viral.set_index("Title")["Viral Score"]
-)
+      st.vega_lite_chart(viral["Viral Chart"], use_container_width=True)
 
     
    
       st.subheader("📅 Weekly Upload & Performance Trend")
 
-      df["Published"] = pd.to_datetime(df["Published"])
-      df["Week"] = df["Published"].dt.to_period("W").astype(str)
+      weekly_views = viral["Weekly Views"]
 
-      weekly_views = df.groupby("Week")["Views"].sum()
-
-      st.line_chart(weekly_views)
+      st.vega_lite_chart(viral["Weekly Chart"], use_container_width=True)
 
     
       st.write("Insights")
 
-      if weekly_views.iloc[-1] > weekly_views.iloc[-2]:
+      if len(weekly_views) < 2:
+        st.info("ℹ Need uploads in at least two weeks to compare weekly growth.")
+      elif weekly_views.iloc[-1] > weekly_views.iloc[-2]:
         st.success("📈 Recent week showing growth! Uploads are gaining momentum.")
       else:
         st.warning("📉 Recent week has fewer views — consistency or topic relevance may be dropping.")
 
     
-      avg_viral = df["Viral Score"].mean()
+      st.subheader("🚨 Outlier & Anomaly Detection")
+
+      threshold = st.slider("Sensitivity (robust z threshold)", 2.0, 6.0, 3.5, 0.5)
+
+      def build_outliers():
+        outliers = detect_video_outliers(df, threshold=threshold)
+        return {
+          "Flagged": df.loc[outliers["Flag"] != "", ["Title", "Published", "Category", "Type", "Views"]].join(outliers).sort_values(by="Published", ascending=False),
+          "Over": int((outliers["Flag"] == "🚀 Over-performer").sum()),
+          "Under": int((outliers["Flag"] == "🐢 Under-performer").sum()),
+          "Weeks": detect_week_anomalies(weekly_views, threshold=threshold)
+        }
+
+      # Nine sensitivity steps, so every setting of the unfiltered view is kept
+      anomalies = snapshot_view(bundle, ("outliers", threshold), build_outliers, full_view, local=True)
+      flagged, week_anomalies = anomalies["Flagged"], anomalies["Weeks"]
+
+      colO, colU = st.columns(2)
+      colO.metric("🚀 Over-performers", anomalies["Over"])
+      colU.metric("🐢 Under-performers", anomalies["Under"])
+
+      if len(flagged):
+        st.dataframe(flagged, use_container_width=True)
+      else:
+        st.info("No video deviates strongly from its recent, category or type baseline.")
+
+      if len(week_anomalies):
+        st.write("📅 Anomalous weeks (vs. trailing 8-week median)")
+        st.dataframe(week_anomalies, use_container_width=True)
+
+    
+      avg_viral = viral["Avg Viral Score"]
 
       if avg_viral > 70:
         st.success(f"🔥 Channel is performing extremely well. Avg Viral Score: **{avg_viral:.2f}**")
@@ -774,62 +2254,77 @@ if st.session_state.start_dashboard:
     with tab6:
       st.subheader("💰 Revenue Insights & Monetization Strategy")
 
-    # Sample RPM mapping (approx values by niche)
-      RPM_MAP = {
-        "Music": 0.60,
-        "Entertainment": 1.20,
-        "Comedy": 0.90,
-        "Education": 2.50,
-        "Technology": 3.20,
-        "Science & Tech": 3.20,
-        "How-to & Style": 1.80,
-        "Gaming": 1.40,
-        "News & Politics": 2.20,
-        "People & Blogs": 1.00,
-        "Unknown": 1.00
-    }
-
-    
-      df["Estimated_RPM"] = df["Category"].map(RPM_MAP).fillna(1)
-      df["Estimated_Revenue"] = (df["Views"] / 1000) * df["Estimated_RPM"]
-
-      df_plot = df.copy()
-      df_plot["Views_M"] = df_plot["Views"] / 1_000_000
+      st.write("🎛 Revenue Scenario")
+      colG, colS, colU = st.columns(3)
+      scenario = (
+        colG.slider("Tier-1 audience share (%)", 0, 100, REVENUE_SCENARIO[0], 5),
+        colS.slider("Shorts RPM vs Long (%)", 1, 100, REVENUE_SCENARIO[1], 1),
+        colU.slider("RPM uncertainty (σ)", 0.05, 1.0, REVENUE_SCENARIO[2], 0.05)
+      )
+      tier1_share, shorts_factor, rpm_sigma = scenario[0] / 100, scenario[1] / 100, scenario[2]
+
+      def build_revenue():
+        revenue, channel_revenue = simulate_revenue(
+          df[["Views", "Category", "Type"]], tier1_share, shorts_factor, rpm_sigma
+      )
+        estimated_revenue = revenue["P50"]
+
+        chart = alt.Chart(alt.NamedData("revenue")).transform_calculate(
+          Views_M="datum.Views / 1000000"
+      ).mark_circle(size=120).encode(
+          x=alt.X("Views_M:Q", title="Views (Millions)"),
+          y=alt.Y("Estimated_Revenue:Q", title="Estimated Revenue (USD $)"),
+          color=alt.Color("Category:N", legend=alt.Legend(title="Content Type")),
+          tooltip=[
+              alt.Tooltip("Title:N"),
+              alt.Tooltip("Views_M:Q", title="Views (M)", format=".2f"),
+              alt.Tooltip("Estimated_Revenue:Q", title="Estimated Revenue ($)", format=".2f"),
+              alt.Tooltip("P10:Q", title="P10 ($)", format=".2f"),
+              alt.Tooltip("P90:Q", title="P90 ($)", format=".2f"),
+              alt.Tooltip("Category:N")
+          ]
+      ).properties(
+          height=380,
+          title="🎯 High Views vs High Revenue Potential"
+      ).interactive()
+
+        top_rev = estimated_revenue.idxmax()
+        low_rev = estimated_revenue.idxmin()
+        return {
+          "Channel": channel_revenue,
+          "Chart": chart_spec(chart, revenue=df[["Title", "Views", "Category"]].assign(Estimated_Revenue=estimated_revenue).join(revenue[["P10", "P90"]])),
+          "Top": (df.at[top_rev, "Title"], estimated_revenue[top_rev]),
+          "Low": (df.at[low_rev, "Title"], estimated_revenue[low_rev]),
+          "Average": estimated_revenue.mean()
+        }
+
+      # Every slider combination would store its own per-video frame, so only the default scenario is kept
+      revenue_view = snapshot_view(bundle, "revenue", build_revenue, full_view and scenario == REVENUE_SCENARIO)
+      channel_revenue = revenue_view["Channel"]
+
+      r1, r2, r3 = st.columns(3)
+      r1.metric("Channel Revenue P10", f"${format_number(channel_revenue['P10'])}")
+      r2.metric("Channel Revenue P50", f"${format_number(channel_revenue['P50'])}")
+      r3.metric("Channel Revenue P90", f"${format_number(channel_revenue['P90'])}")
+      st.caption(f"{REVENUE_DRAWS:,} Monte Carlo RPM draws per category; per-video values below are the P50.")
 
       st.write("📊 Estimated Revenue vs Views")
 
-    
-      chart = alt.Chart(df_plot).mark_circle(size=120).encode(
-        x=alt.X("Views_M:Q", title="Views (Millions)"),
-        y=alt.Y("Estimated_Revenue:Q", title="Estimated Revenue (USD $)"),
-        color=alt.Color("Category:N", legend=alt.Legend(title="Content Type")),
-        tooltip=[
-            alt.Tooltip("Title:N"),
-            alt.Tooltip("Views_M:Q", title="Views (M)", format=".2f"),
-            alt.Tooltip("Estimated_Revenue:Q", title="Estimated Revenue ($)", format=".2f"),
-            alt.Tooltip("Category:N")
-        ]
-    ).properties(
-        height=380,
-        title="🎯 High Views vs High Revenue Potential"
-    ).interactive()
-
-      st.altair_chart(chart, use_container_width=True)
+      st.vega_lite_chart(revenue_view["Chart"], use_container_width=True)
 
     # -------- Insight Section --------
       st.markdown("### Key Monetization Insights")
 
-      top_rev = df.sort_values(by="Estimated_Revenue", ascending=False).iloc[0]
-      low_rev = df.sort_values(by="Estimated_Revenue", ascending=True).iloc[0]
-      avg_rev = df["Estimated_Revenue"].mean()
+      (top_title, top_value), (low_title, low_value) = revenue_view["Top"], revenue_view["Low"]
+      avg_rev = revenue_view["Average"]
 
       st.markdown(
         f"""
          **Highest Revenue Video:**  
-         `{top_rev['Title'][:45]}...` — Estimated **${top_rev['Estimated_Revenue']:.2f}**
+         `{top_title[:45]}...` — Estimated **${top_value:.2f}**
 
          **Lowest Revenue Despite Views:**  
-        `{low_rev['Title'][:45]}...` — Only **${low_rev['Estimated_Revenue']:.2f}**
+        `{low_title[:45]}...` — Only **${low_value:.2f}**
 
         **Average Estimated Revenue Per Video:**  
         💵 **${avg_rev:.2f}**
@@ -841,26 +2336,30 @@ if st.session_state.start_dashboard:
         - Music & Entertainment gain **mass views but lower RPM**
         """
     )
-      funnel = {
-        "Total Videos": len(df),
-        "Above Avg Views": len(df[df["Views"] > df["Views"].mean()]),
-        "High Engagement (Views + Engagement > Avg)": len(df[(df["Views"] > df["Views"].mean()) & 
-                                                            (df["Engagement (%)"] > df["Engagement (%)"].mean())]),
-        "Viral Score > 80": len(df[df["Viral Score"] > 80])
-    }
+      def build_funnel():
+        funnel = {
+          "Total Videos": len(df),
+          "Above Avg Views": len(df[df["Views"] > df["Views"].mean()]),
+          "High Engagement (Views + Engagement > Avg)": len(df[(df["Views"] > df["Views"].mean()) & 
+                                                              (df["Engagement (%)"] > df["Engagement (%)"].mean())]),
+          "Viral Score > 80": len(df[df["Viral Score"] > 80])
+      }
 
-      funnel_df = pd.DataFrame(list(funnel.items()), columns=["Stage", "Video Count"])
+        funnel_df = pd.DataFrame(list(funnel.items()), columns=["Stage", "Video Count"])
 
     
-      import plotly.express as px
-      fig = px.funnel(
-        funnel_df,
-        x="Video Count",
-        y="Stage",
-        color="Stage",
-        title="📊 Video Performance Funnel"
-    )
-      st.plotly_chart(fig, use_container_width=True)
+        import plotly.express as px
+        fig = px.funnel(
+          funnel_df,
+          x="Video Count",
+          y="Stage",
+          color="Stage",
+          title="📊 Video Performance Funnel"
+      )
+        return funnel, fig.to_dict()
+
+      funnel, funnel_figure = snapshot_view(bundle, "funnel", build_funnel, full_view)
+      st.plotly_chart(funnel_figure, use_container_width=True)
 
       st.write("🔍 **Insights:**")
       total = funnel["Total Videos"]
@@ -882,18 +2381,25 @@ if st.session_state.start_dashboard:
      corr_columns = ["Views", "Likes", "Comments", "Engagement (%)", "Duration (mins)", "Viral Score"]
     
     
-     corr_data = df[corr_columns].corr()
+     corr_data = snapshot_view(bundle, "correlation", lambda: df[corr_columns].corr(), full_view)
 
     
-     fig, ax = plt.subplots(figsize=(8, 5))
-     sns.heatmap(corr_data, annot=True, cmap="coolwarm", linewidths=0.5, fmt=".2f")
-     st.pyplot(fig)
+     def render_heatmap():
+      fig, ax = plt.subplots(figsize=(8, 5))
+      sns.heatmap(corr_data, annot=True, cmap="coolwarm", linewidths=0.5, fmt=".2f", ax=ax)
+      return fig
+
+     st.image(snapshot_figure(snapshot_id, bundle, "correlation_heatmap", corr_data, render_heatmap, shared=full_view))
 
     
-     highest_corr = corr_data.replace(1.0, 0).unstack().sort_values(ascending=False).index[0]
-     metric1, metric2 = highest_corr
+     # Fewer than two videos (or a constant column) leaves the matrix all NaN
+     corr_pairs = corr_data.replace(1.0, 0).unstack().dropna()
+     if corr_pairs.empty:
+      st.info("ℹ Need at least two videos with varying stats to find correlations.")
+     else:
+      metric1, metric2 = corr_pairs.sort_values(ascending=False).index[0]
 
-     st.markdown(f"""
+      st.markdown(f"""
     ###  Key Insight:
     The strongest relationship detected is between:
 
@@ -905,15 +2411,45 @@ if st.session_state.start_dashboard:
 
      st.info(" Use this insight to decide content strategy — जैसे अगर Likes & Views high correlate कर रहे हैं, तो बेहतर Call-to-Action, captions और thumbnails views बढ़ा सकते हैं।")
 
+     st.divider()
+     st.subheader("🔤 Title Keyword Lift")
+
+     min_support = st.slider("Minimum videos per keyword", 2, 20, 3)
+     keyword_lift = snapshot_view(bundle, ("keyword_lift", min_support), lambda: compute_keyword_lift(
+         bundle["version"], filter_key, min_support,
+         channel_df[[c for c in ["VideoID", "Title", "Tags"] if c in channel_df.columns]], df
+     ), full_view)
+
+     if keyword_lift.empty:
+      st.info("ℹ Not enough repeated keywords in these titles — lower the minimum support.")
+     else:
+      st.caption("Lift = keyword's median ÷ channel median. **1.5** means videos using it get 50% more.")
+      colTop, colLow = st.columns(2)
+      with colTop:
+        st.write("🚀 Keywords that lift views")
+        st.dataframe(keyword_lift.head(15), use_container_width=True)
+      with colLow:
+        st.write("🐢 Keywords that drag views")
+        st.dataframe(keyword_lift.tail(10).iloc[::-1], use_container_width=True)
+
+      top_term = keyword_lift.index[0]
+      st.markdown(f"💡 **Insight:** Titles with **`{top_term}`** get **{keyword_lift.iloc[0]['Views Lift']}×** the channel's median views.")
+
     with tab10:
        st.subheader("Single Video Deep-Dive")
 
-       selected_title = st.selectbox(
+       ranks, positions, channel_means, titles = snapshot_view(bundle, "video_index", lambda: build_video_index(
+           df[["VideoID", "Category", "Type"] + [m for m in RANK_METRICS if m in df.columns]]
+       ) + (dict(zip(df["VideoID"], df["Title"])),), full_view)
+
+       selected_id = st.selectbox(
         "Select a Video",
-        df["Title"].tolist()
+        ranks.index.tolist(),
+        format_func=lambda vid: f"{titles[vid]} ({vid})"
     )
 
-       video = df[df["Title"] == selected_title].iloc[0]
+       video = df.iloc[positions[selected_id]]
+       video_ranks = lookup_video(ranks, selected_id)
 
        col1, col2, col3, col4 = st.columns(4)
        col1.metric(" Views", format_number(video["Views"]))
@@ -925,21 +2461,20 @@ if st.session_state.start_dashboard:
        st.write("**Title:**", video["Title"])
        st.write("**Category:**", video["Category"])
        st.write("**Duration:**", video["Duration (mins)"], "mins")
-       st.write("**Published:**", video["Published"])
+       st.write("**Published:**", video["Published"].strftime("%Y-%m-%d %H:%M %Z") if pd.notna(video["Published"]) else "Unknown")
        st.write("**Type:**", video["Type"])
-       st.write("**Video URL:**", video["URL"])
+       st.write("**Video URL:**", video_url(video["VideoID"]))
 
-       thumbnail_url = f"https://i.ytimg.com/vi/{video['VideoID']}/hqdefault.jpg"
-       st.image(thumbnail_url, caption="Video Thumbnail", width=350)
+       st.image(thumbnail_url(video["VideoID"]), caption="Video Thumbnail", width=350)
 
        st.markdown("###  Performance Insight")
 
-       if video["Views"] > df["Views"].mean():
-        st.success("This video performed ABOVE average.")
+       if video_ranks.loc["Views", "Z-Score"] > 0:
+        st.success(f"This video performed ABOVE average — better than **{video_ranks.loc['Views', 'Percentile']:.0f}%** of the channel's videos.")
        else:
-        st.warning("This video performed BELOW average.")
+        st.warning(f"This video performed BELOW average — better than only **{video_ranks.loc['Views', 'Percentile']:.0f}%** of the channel's videos.")
 
-       if video["Engagement (%)"] > df["Engagement (%)"].mean():
+       if video_ranks.loc["Engagement (%)", "Z-Score"] > 0:
         st.success("Engagement is strong.")
        else:
         st.info("ℹ Engagement can be improved with better CTA or title.")
@@ -955,22 +2490,52 @@ if st.session_state.start_dashboard:
             video["Comments"]
         ],
         "Channel Average": [
-            df["Views"].mean(),
-            df["Likes"].mean(),
-            df["Comments"].mean()
+            channel_means["Views"],
+            channel_means["Likes"],
+            channel_means["Comments"]
         ]
     })
 
        st.bar_chart(compare_df.set_index("Metric"))
 
+       st.markdown("###  Where This Video Sits in the Channel")
+       st.dataframe(
+        video_ranks.style.format("{:.1f}"),
+        use_container_width=True
+    )
+       st.caption(f"Category and Type percentiles compare against other **{video['Category']}** videos and other **{video['Type']}** videos.")
 
 
+    with tab11:
+       st.subheader("🌐 Cross-Channel Peer Benchmark")
 
+       profile = snapshot_view(bundle, "profile", lambda: channel_profile(
+           channel_df, channel_id, channel_name, n_uploads=len(bundle["uploads"]) if bundle.get("uploads") else None
+       ))
+       update_corpus(profile, bundle["version"])
+       sketches = load_sketches(os.path.getmtime(SKETCH_PATH))
 
+       # The channel is in its own category's sketch, so it needs at least one other channel there
+       peer_group = profile["Category"] if sketches.get(profile["Category"], {}).get("Channels", 0) > 1 else "All"
+       sketch = sketches[peer_group]
 
+       st.caption(
+        f"Compared against **{sketch['Channels'] - 1}** other locally indexed channel(s) in **{peer_group}** "
+        f"({sketches['All']['Channels']} channels in the whole corpus)."
+    )
 
+       benchmark_df = pd.DataFrame({
+        "Metric": CORPUS_METRICS,
+        "This Channel": [profile[m] for m in CORPUS_METRICS],
+        "Peer Median": [peer_median(sketch, m, profile[m]) for m in CORPUS_METRICS],
+        "Peer Percentile": [peer_percentile(sketch, m, profile[m]) for m in CORPUS_METRICS]
+    })
 
+       st.dataframe(benchmark_df.style.format({"This Channel": "{:,.2f}", "Peer Median": "{:,.2f}", "Peer Percentile": "{:.0f}"}), use_container_width=True)
+       st.bar_chart(benchmark_df.set_index("Metric")["Peer Percentile"])
 
+       if sketch["Channels"] < 11:
+        st.info("ℹ Peer percentiles get more reliable as more channels are analyzed on this server.")
 
-
-    
\ No newline at end of file
+    # One merge for every view this rerun built, so the next viewer is served from the bundle
+    save_views(snapshot_id, bundle)
@@ -0,0 +1,293 @@
+"""Concurrent-session load test for app.py.
+
+Runs N simulated viewers through Streamlit's AppTest against a local fake
+YouTube Data API and reports rerun latency percentiles, throughput and memory.
+
+    python load_test.py --sessions 8 --videos 120 --api-latency 40
+"""
+import argparse
+import email.parser
+import hashlib
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import parse_qs, urlparse
+
+import streamlit as st
+from PIL import Image
+from streamlit.runtime.secrets import Secrets
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+CHANNEL_ID = "UCloadtest0000000000000000"
+CATEGORY_IDS = ["10", "20", "22", "24", "27", "28"]
+
+
+# ---------------- FAKE YOUTUBE API ----------------
+def fake_video(video_id):
+    rng = random.Random(video_id)
+    views = int(rng.lognormvariate(11, 1.5))
+    published = time.gmtime(1_600_000_000 + rng.randrange(0, 4 * 365 * 86400))
+    return {
+        "id": video_id,
+        "snippet": {
+            "title": f"{rng.choice(['Python', 'Music', 'Travel', 'Gaming'])} video {video_id}"
+                     + (" #shorts" if rng.random() < 0.3 else ""),
+            "categoryId": rng.choice(CATEGORY_IDS),
+            "publishedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", published)
+        },
+        "contentDetails": {"duration": f"PT{rng.randrange(0, 30)}M{rng.randrange(5, 60)}S"},
+        "statistics": {
+            "viewCount": str(views),
+            "likeCount": str(int(views * rng.uniform(0.01, 0.06))),
+            "commentCount": str(int(views * rng.uniform(0.0005, 0.004)))
+        }
+    }
+
+
+class FakeYouTubeApi:
+    def __init__(self, n_videos, latency):
+        self.video_ids = [f"vid{i:07d}" for i in range(n_videos)]
+        self.latency = latency
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def respond(self, path, query):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.latency)
+
+        endpoint = path.rstrip("/").rsplit("/", 1)[-1]
+        if endpoint == "search":
+            return 200, {"items": [{"snippet": {"channelId": CHANNEL_ID}}]}
+
+        if endpoint == "channels":
+            return 200, {"items": [{
+                "id": channel_id,
+                "contentDetails": {"relatedPlaylists": {"uploads": "UU" + channel_id[2:]}},
+                "snippet": {"title": "Load Test Channel", "thumbnails": {"high": {"url": ""}}},
+                "statistics": {"subscriberCount": "123456", "viewCount": "1000000", "videoCount": str(len(self.video_ids))}
+            } for channel_id in query.get("id", [""])[0].split(",")]}
+
+        if endpoint == "playlistItems":
+            start = int(query.get("pageToken", ["0"])[0])
+            size = int(query.get("maxResults", ["50"])[0])
+            page = {"items": [{"contentDetails": {"videoId": v}} for v in self.video_ids[start:start + size]]}
+            if start + size < len(self.video_ids):
+                page["nextPageToken"] = str(start + size)
+            return 200, page
+
+        if endpoint == "videos":
+            return 200, {"items": [fake_video(v) for v in query.get("id", [""])[0].split(",") if v]}
+
+        return 404, {"error": {"code": 404, "message": f"Unknown endpoint {path}"}}
+
+    def respond_batch(self, content_type, body):
+        # multipart/mixed in, multipart/mixed out, one application/http part per call
+        message = email.parser.BytesParser().parsebytes(b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body)
+        boundary = "batch_load_test"
+        parts = []
+        for part in message.get_payload():
+            request_line = part.get_payload().split("\n", 1)[0].strip()
+            url = urlparse(request_line.split(" ")[1])
+            status, payload = self.respond(url.path, parse_qs(url.query))
+            content_id = part["Content-ID"].replace("<", "<response-", 1)
+            parts.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: {content_id}\r\n\r\n"
+                f"HTTP/1.1 {status} OK\r\nContent-Type: application/json; charset=UTF-8\r\n\r\n"
+                f"{json.dumps(payload)}\r\n"
+            )
+        return f"multipart/mixed; boundary={boundary}", ("".join(parts) + f"--{boundary}--\r\n").encode()
+
+
+def thumbnail_png(video_id):
+    shade = int(hashlib.sha1(video_id.encode()).hexdigest()[:2], 16)
+    buffer = BytesIO()
+    Image.new("RGB", (48, 27), (shade, shade, shade)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def make_handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def send(self, status, body, content_type="application/json; charset=UTF-8"):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path.startswith("/vi/"):
+                return self.send(200, thumbnail_png(url.path.split("/")[2]), "image/png")
+            status, payload = api.respond(url.path, parse_qs(url.query))
+            self.send(status, json.dumps(payload).encode())
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            content_type, payload = api.respond_batch(self.headers["Content-Type"], body)
+            self.send(200, payload, content_type)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+# ---------------- SESSION FLOW ----------------
+def timed_run(at, step, timings, timeout):
+    start = time.perf_counter()
+    at.run(timeout=timeout)
+    timings.append((step, time.perf_counter() - start))
+    if at.exception:
+        raise RuntimeError(f"{step}: {at.exception[0].message}")
+
+
+def widget(elements, label):
+    return next(e for e in elements if e.label == label)
+
+
+def install_secrets(secrets):
+    # AppTest swaps the global st.secrets around every run when given its own
+    # secrets, which races between threads; all sessions share one set instead
+    shared = Secrets()
+    shared._secrets = secrets
+    st.secrets = shared
+
+
+def run_session(session_no, timeout):
+    timings = []
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+
+    timed_run(at, "home", timings, timeout)
+
+    # Fetch a channel
+    at.text_input[0].input(f"https://www.youtube.com/channel/{CHANNEL_ID}")
+    at.button[0].click()
+    timed_run(at, "fetch channel", timings, timeout)
+
+    # Tabs are client-side in Streamlit; "switching" means interacting with their widgets
+    widget(at.slider, "Sensitivity (robust z threshold)").set_value(2.5)
+    timed_run(at, "tab: outliers", timings, timeout)
+    widget(at.slider, "Tier-1 audience share (%)").set_value(60)
+    timed_run(at, "tab: revenue", timings, timeout)
+
+    deep_dive = widget(at.selectbox, "Select a Video")
+    deep_dive.select_index((session_no * 7) % len(deep_dive.options))
+    timed_run(at, "deep-dive select", timings, timeout)
+
+    widget(at.button, "📥 Generate PDF Report").click()
+    timed_run(at, "generate pdf", timings, timeout)
+
+    # Every tab has to render on a single-video filter (no weeks or pairs to compare)
+    widget(at.text_input, "Search titles").input(f"vid{session_no:07d}")
+    timed_run(at, "one-row filter", timings, timeout)
+    widget(at.text_input, "Search titles").input("")
+    timed_run(at, "clear filter", timings, timeout)
+
+    return timings
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def peak_rss_bytes():
+    # ru_maxrss is KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def report(timings, wall_seconds, sessions, baseline_bytes):
+    rows = {}
+    for step, seconds in timings:
+        rows.setdefault(step, []).append(seconds)
+    rows["ALL RERUNS"] = [seconds for _, seconds in timings]
+
+    print(f"\n{'step':<20}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for step, values in rows.items():
+        print(
+            f"{step:<20}{len(values):>6}"
+            f"{percentile(values, 50) * 1000:>10.0f}{percentile(values, 95) * 1000:>10.0f}"
+            f"{percentile(values, 99) * 1000:>10.0f}{max(values) * 1000:>10.0f}"
+        )
+
+    print(f"\nsessions: {sessions}   wall time: {wall_seconds:.1f}s")
+    print(f"throughput: {len(timings) / wall_seconds:.2f} reruns/s, {sessions / wall_seconds:.2f} sessions/s")
+    grown = (peak_rss_bytes() - baseline_bytes) / 2**20
+    print(f"peak RSS growth: {grown:.1f} MB (~{grown / sessions:.1f} MB per session)")
+    return percentile(rows["ALL RERUNS"], 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for the YouTube Analyzer app")
+    parser.add_argument("--sessions", type=int, default=8, help="total simulated viewers")
+    parser.add_argument("--concurrency", type=int, default=None, help="viewers running at once (default: all)")
+    parser.add_argument("--videos", type=int, default=120, help="videos in the fake channel")
+    parser.add_argument("--api-latency", type=float, default=30, help="fake API latency per call in ms")
+    parser.add_argument("--timeout", type=float, default=120, help="per-rerun timeout in seconds")
+    parser.add_argument("--max-p95", type=float, default=None, help="fail if p95 rerun latency exceeds this (ms)")
+    args = parser.parse_args()
+
+    # app.py loads its logo by relative path
+    os.chdir(os.path.dirname(APP_PATH))
+
+    api = FakeYouTubeApi(args.videos, args.api_latency / 1000)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(api))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_port}"
+
+    # Snapshots and the peer corpus go to a scratch dir so real ones are untouched
+    scratch = tempfile.mkdtemp(prefix="yt_load_test_")
+    secrets = {
+        "API_KEY": "load-test",
+        "API_ENDPOINT": endpoint + "/",
+        "THUMBNAIL_HOST": endpoint,
+        "SNAPSHOT_DIR": os.path.join(scratch, "snapshots"),
+        "CORPUS_DIR": os.path.join(scratch, "corpus")
+    }
+
+    install_secrets(secrets)
+    baseline = peak_rss_bytes()
+    start = time.perf_counter()
+    failures = 0
+    timings = []
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency or args.sessions) as pool:
+            futures = [pool.submit(run_session, i, args.timeout) for i in range(args.sessions)]
+            for future in futures:
+                try:
+                    timings.extend(future.result())
+                except Exception as e:
+                    failures += 1
+                    print(f"session failed: {e}", file=sys.stderr)
+    finally:
+        wall = time.perf_counter() - start
+        server.shutdown()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    if not timings:
+        print("no session completed", file=sys.stderr)
+        return 1
+
+    p95 = report(timings, wall, args.sessions, baseline)
+    print(f"fake API calls: {api.calls}   failed sessions: {failures}")
+
+    if failures or (args.max_p95 is not None and p95 * 1000 > args.max_p95):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())